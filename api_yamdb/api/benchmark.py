@@ -0,0 +1,134 @@
+"""Замеры задержки и SQL-запросов эндпоинтов API.
+
+Используется командой benchmark_api: каждый маршрут из api/urls.py
+вызывается тестовым клиентом Django в том же процессе, поэтому в замер
+входит вся обработка запроса, кроме сети.
+"""
+import statistics
+import time
+
+from django.db import connection
+from django.test import Client
+
+from .instrumentation import is_select
+
+PERCENTILES = (50, 95, 99)
+
+
+class Route:
+    """Запрос к одному эндпоинту.
+
+    url и data могут быть функциями от номера итерации: так у запросов на
+    регистрацию и получение токена каждый раз новый пользователь, а отзыв
+    каждый раз пишется к новому произведению.
+    """
+
+    def __init__(self, name, url, method='get', data=None, token=None,
+                 status=200):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data
+        self.token = token
+        self.status = status
+
+    def get_url(self, iteration):
+        if callable(self.url):
+            return self.url(iteration)
+        return self.url
+
+    def get_data(self, iteration):
+        if callable(self.data):
+            return self.data(iteration)
+        return self.data
+
+    def request(self, client, iteration):
+        extra = {}
+        if self.token:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {self.token}'
+        send = getattr(client, self.method)
+        url = self.get_url(iteration)
+        if self.method == 'get':
+            return send(url, self.get_data(iteration), **extra)
+        return send(
+            url, self.get_data(iteration),
+            content_type='application/json', **extra
+        )
+
+
+class QueryRecorder:
+    """execute_wrapper, запоминающий SQL-запросы с параметрами."""
+
+    def __init__(self):
+        self.queries = []
+        self.rows_written = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries.append((sql, params, many))
+        if not is_select(sql):
+            self.rows_written += max(context['cursor'].rowcount, 0)
+        return result
+
+    def count_rows_read(self):
+        """Сколько строк вернули SELECT-запросы.
+
+        Запросы повторяются в виде SELECT COUNT(*) уже после замера,
+        чтобы не влиять на время ответа.
+        """
+        rows = 0
+        with connection.cursor() as cursor:
+            for sql, params, many in self.queries:
+                if many or not is_select(sql):
+                    continue
+                cursor.execute(f'SELECT COUNT(*) FROM ({sql})', params)
+                rows += cursor.fetchone()[0]
+        return rows
+
+
+def get_percentiles(samples):
+    if len(samples) == 1:
+        return {f'p{p}': samples[0] for p in PERCENTILES}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {f'p{p}': cuts[p - 1] for p in PERCENTILES}
+
+
+def run_route(route, iterations, warmup=0, client=None):
+    """Вызывает маршрут warmup + iterations раз и возвращает замеры.
+
+    Время считается только по iterations последним вызовам, число
+    запросов и строк — по отдельному вызову после них.
+    """
+    client = client or Client()
+    samples = []
+    for iteration in range(warmup + iterations):
+        started = time.perf_counter()
+        response = route.request(client, iteration)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != route.status:
+            raise AssertionError(
+                f'{route.name}: {route.method.upper()} '
+                f'{route.get_url(iteration)} вернул '
+                f'{response.status_code} вместо {route.status}'
+            )
+        if iteration >= warmup:
+            samples.append(elapsed)
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        route.request(client, warmup + iterations)
+    result = {
+        'method': route.method.upper(),
+        'url': route.get_url(0),
+        'iterations': iterations,
+        'mean_ms': statistics.fmean(samples),
+    }
+    result.update(
+        (f'{name}_ms', value)
+        for name, value in get_percentiles(samples).items()
+    )
+    result.update(
+        queries=len(recorder.queries),
+        rows_read=recorder.count_rows_read(),
+        rows_written=recorder.rows_written,
+    )
+    return result
@@ -0,0 +1,284 @@
+"""Server-Sent Events: новые отзывы и комментарии к произведению.
+
+GET /api/v1/titles/<id>/events/ держит соединение открытым и присылает
+событие на каждый новый отзыв или комментарий к произведению. Источник —
+журнал изменений: один наблюдатель на процесс читает его раз в
+EVENTS_POLL_INTERVAL секунд и раздаёт события подписчикам в памяти,
+поэтому число запросов к БД не зависит от числа клиентов. Пропущенное
+(заголовок Last-Event-ID при переподключении) досылается из журнала, если
+с тех пор в него записано не больше EVENTS_REPLAY_LIMIT записей; иначе
+клиент получает событие reset и перечитывает отзывы через API.
+
+Django 3.2 не умеет асинхронных потоковых ответов, поэтому поток
+обслуживает отдельное ASGI-приложение перед Django (см. asgi.py); под
+WSGI эндпоинта нет.
+"""
+import asyncio
+import json
+import re
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from reviews.changelog import read_changes
+from reviews.models import ChangeLogEntry, Comment, Review, Title
+from .serializers import CommentSyncSerializer, ReviewSyncSerializer
+
+EVENTS_PATH = re.compile(r'^/api/v1/titles/(?P<title_id>\d+)/events/$')
+BATCH_SIZE = 500
+# Событий в очереди клиента; кто не успевает читать, переподключится.
+QUEUE_SIZE = 100
+# Метка модели в журнале: (имя события, queryset, сериализатор).
+EVENT_SOURCES = {
+    'reviews.review': (
+        'review', Review.objects.select_related('author'),
+        ReviewSyncSerializer
+    ),
+    'reviews.comment': (
+        'comment', Comment.objects.select_related('author', 'review'),
+        CommentSyncSerializer
+    ),
+}
+
+Event = namedtuple('Event', ('id', 'title_id', 'name', 'data'))
+
+
+def get_title_id(instance):
+    if isinstance(instance, Review):
+        return instance.title_id
+    return instance.review.title_id
+
+
+def get_last_id():
+    return ChangeLogEntry.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+
+
+def build_events(entries, title_id=None):
+    """События по записям журнала; удалённые объекты пропускаются."""
+    entries = [
+        entry for entry in entries if entry.action == ChangeLogEntry.CREATE
+    ]
+    objects = {
+        label: queryset.in_bulk(
+            [entry.object_id for entry in entries if entry.model == label]
+        )
+        for label, (_, queryset, _) in EVENT_SOURCES.items()
+    }
+    events = []
+    for entry in entries:
+        instance = objects[entry.model].get(entry.object_id)
+        if instance is None:
+            continue
+        instance_title_id = get_title_id(instance)
+        if title_id is not None and instance_title_id != title_id:
+            continue
+        name, _, serializer_class = EVENT_SOURCES[entry.model]
+        events.append(Event(
+            entry.id, instance_title_id, name,
+            serializer_class(instance).data
+        ))
+    return events
+
+
+def fetch_events(after):
+    """Новые отзывы и комментарии после записи журнала after.
+
+    Возвращает номер последней прочитанной записи и события по порядку.
+    """
+    entries = read_changes(after, BATCH_SIZE, EVENT_SOURCES)
+    if not entries:
+        return after, []
+    return entries[-1].id, build_events(entries)
+
+
+def fetch_backlog(after, title_id):
+    """Пропущенные события произведения после записи журнала after.
+
+    Если с тех пор в журнал записано больше EVENTS_REPLAY_LIMIT записей,
+    возвращает None: клиенту дешевле перечитать отзывы через API.
+    """
+    if get_last_id() - after > settings.EVENTS_REPLAY_LIMIT:
+        return None
+    entries = ChangeLogEntry.objects.filter(
+        Q(
+            model='reviews.review',
+            object_id__in=Review.objects.filter(
+                title_id=title_id
+            ).values('id')
+        ) | Q(
+            model='reviews.comment',
+            object_id__in=Comment.objects.filter(
+                review__title_id=title_id
+            ).values('id')
+        ),
+        id__gt=after,
+        action=ChangeLogEntry.CREATE,
+    ).order_by('id')[:settings.EVENTS_REPLAY_LIMIT]
+    return build_events(entries, title_id)
+
+
+def format_reset(last_id):
+    return f'id: {last_id}\nevent: reset\ndata: {{}}\n\n'.encode()
+
+
+def format_event(event):
+    data = json.dumps(event.data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f'id: {event.id}\nevent: {event.name}\ndata: {data}\n\n'.encode()
+
+
+class Broker:
+    """Подписки процесса на произведения и их общий наблюдатель.
+
+    Наблюдатель запускается с первым подписчиком и останавливается, когда
+    подписчиков не осталось.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.watcher = None
+        self.last_id = None
+
+    def subscribe(self, title_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.setdefault(title_id, set()).add(queue)
+        if self.watcher is None or self.watcher.done():
+            self.watcher = asyncio.ensure_future(self.watch())
+        return queue
+
+    def unsubscribe(self, title_id, queue):
+        queues = self.subscribers.get(title_id, set())
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(title_id, None)
+
+    def publish(self, event):
+        for queue in self.subscribers.get(event.title_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # None закрывает поток: клиент переподключится
+                # с Last-Event-ID и получит пропущенное из журнала.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def watch(self):
+        self.last_id = await sync_to_async(get_last_id)()
+        while self.subscribers:
+            self.last_id, events = await sync_to_async(fetch_events)(
+                self.last_id
+            )
+            for event in events:
+                self.publish(event)
+            await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+
+
+broker = Broker()
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def get_last_event_id(scope):
+    for name, value in scope.get('headers', ()):
+        if name == b'last-event-id' and value.isdigit():
+            return int(value)
+    return None
+
+
+async def send_event(send, event):
+    await send({
+        'type': 'http.response.body',
+        'body': format_event(event),
+        'more_body': True,
+    })
+
+
+async def replay(send, sent, title_id):
+    """Досылает пропущенное; возвращает номер последнего события."""
+    backlog = await sync_to_async(fetch_backlog)(sent, title_id)
+    if backlog is None:
+        # Пропущено слишком много: клиент перечитывает данные заново.
+        sent = await sync_to_async(get_last_id)()
+        await send({'type': 'http.response.body',
+                    'body': format_reset(sent), 'more_body': True})
+        return sent
+    for event in backlog:
+        await send_event(send, event)
+        sent = event.id
+    return sent
+
+
+async def relay(queue, send, receive, sent):
+    """Пересылает события очереди, пока клиент не отключится."""
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {get, disconnect}, timeout=settings.EVENTS_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if get not in done:
+                get.cancel()
+                if disconnect in done:
+                    return True
+                # Комментарий SSE не даёт прокси закрыть соединение.
+                await send({'type': 'http.response.body',
+                            'body': b': ping\n\n', 'more_body': True})
+                continue
+            event = get.result()
+            if event is None:
+                return False
+            if event.id > sent:
+                await send_event(send, event)
+                sent = event.id
+    finally:
+        disconnect.cancel()
+
+
+async def stream_events(scope, receive, send, title_id):
+    exists = await sync_to_async(Title.objects.filter(pk=title_id).exists)()
+    if not exists:
+        await send({'type': 'http.response.start', 'status': 404,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body',
+                    'body': b'{"detail": "Not found."}'})
+        return
+    # Подписка до чтения пропущенного, чтобы не потерять события между
+    # ними; повторы отсекаются по номеру.
+    queue = broker.subscribe(title_id)
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [
+                        (b'content-type', b'text/event-stream'),
+                        (b'cache-control', b'no-cache'),
+                        (b'x-accel-buffering', b'no'),
+                    ]})
+        sent = get_last_event_id(scope) or 0
+        if sent:
+            sent = await replay(send, sent, title_id)
+        disconnected = await relay(queue, send, receive, sent)
+    finally:
+        broker.unsubscribe(title_id, queue)
+    if not disconnected:
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+def events_application(application):
+    """ASGI-приложение: поток событий, остальное — в application."""
+    async def route(scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = EVENTS_PATH.match(scope['path'])
+            if match:
+                title_id = int(match.group('title_id'))
+                return await stream_events(scope, receive, send, title_id)
+        return await application(scope, receive, send)
+    return route
@@ -1,26 +1,99 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
 from reviews.models import Title
+from reviews.search import is_supported, make_match_query
+
+
+GENRE_MATCH_CHOICES = (
+    ('any', 'хотя бы один из жанров'),
+    ('all', 'все жанры'),
+)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Сортировка `?ordering=-rating,year` с id в конце.
+
+    id идёт в том же направлении, что и первое поле: равные значения не
+    меняются местами между страницами, а сортировка по одному полю
+    полностью покрывается его индексом (в SQLite он включает rowid).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        tiebreaker = '-id' if ordering[0].startswith('-') else 'id'
+        return [*ordering, tiebreaker]
+
+
+class SlugListFilter(filters.BaseInFilter, filters.CharFilter):
+    """Список slug через запятую: `?genre=drama,comedy`."""
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+    # Точное совпадение slug идёт по уникальному индексу.
+    category = SlugListFilter(field_name='category__slug', lookup_expr='in')
+    genre = SlugListFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES,
+        method='skip',
+        empty_label=None
     )
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
-    year = filters.NumberFilter(
-        field_name='year',
-        lookup_expr='icontains'
-    )
+    search = filters.CharFilter(method='filter_search')
+    # Диапазоны по году идут по индексу (category_id, year).
+    year = filters.NumberFilter(field_name='year')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    decade = filters.NumberFilter(method='filter_decade')
 
     class Meta:
         model = Title
-        fields = '__all__'
+        # Только объявленные выше фильтры: служебные колонки (version,
+        # rating_sum, updated_at) без индексов фильтрами не становятся.
+        fields = (
+            'category', 'genre', 'genre_match', 'name', 'search', 'year',
+            'year_min', 'year_max', 'decade',
+        )
+
+    def skip(self, queryset, name, value):
+        return queryset
+
+    def filter_genre(self, queryset, name, value):
+        """Произведения с любым (`genre_match=any`) или всеми жанрами.
+
+        Проверка через EXISTS по таблице связей, а не JOIN: одно
+        произведение с несколькими подходящими жанрами не дублируется.
+        """
+        links = Title.genre.through.objects.filter(title=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_match') != 'all':
+            return queryset.filter(
+                Exists(links.filter(genre__slug__in=value))
+            )
+        for slug in value:
+            queryset = queryset.filter(Exists(links.filter(genre__slug=slug)))
+        return queryset
+
+    def filter_decade(self, queryset, name, value):
+        """`?decade=1990` — произведения 1990–1999 годов."""
+        start = int(value) // 10 * 10
+        return queryset.filter(year__gte=start, year__lt=start + 10)
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию, лучшие совпадения первыми.
+
+        Слова ищутся по префиксу без учёта регистра.
+        """
+        if not is_supported():
+            return queryset.filter(name__icontains=value)
+        query = make_match_query(value)
+        if query is None:
+            return queryset
+        return queryset.filter(search_index__name__match=query).order_by(
+            'search_index__rank', 'id'
+        )
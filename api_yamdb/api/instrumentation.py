@@ -0,0 +1,198 @@
+"""Замеры времени и SQL-запросов каждого запроса к API.
+
+RequestInstrumentationMiddleware собирает число и время SQL-запросов,
+повторяющиеся запросы (признак N+1), время вьюхи, сериализации и
+рендеринга. Итог уходит в заголовок Server-Timing, одной JSON-строкой
+в лог `api.requests` и в метрики api.metrics. На запрос добавляется
+несколько вызовов perf_counter() и словарь с текстами запросов, поэтому
+мидлварь можно держать включённой и в продакшене.
+"""
+import json
+import logging
+import zlib
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connection
+
+from . import metrics
+
+logger = logging.getLogger('api.requests')
+
+# Сколько повторяющихся запросов попадает в лог.
+MAX_DUPLICATES = 5
+SQL_PREVIEW_LENGTH = 200
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+def is_select(sql):
+    return sql.lstrip()[:6].upper() == 'SELECT'
+
+
+def fingerprint(sql):
+    """Короткий отпечаток запроса: параметры в sql не подставлены, поэтому
+    одинаковые запросы с разными значениями дают один отпечаток."""
+    return format(zlib.crc32(sql.encode()), '08x')
+
+
+class RequestTimings:
+    """Замеры одного запроса, время — в секундах."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.started = perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.statements = {}
+        self.serialize = 0.0
+        self.serializing = False
+        self.view_name = None
+        self.view_started = None
+        self.view_finished = None
+        self.finished = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper для соединения с базой."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - started
+            self.queries += 1
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    @property
+    def total(self):
+        return self.finished - self.started
+
+    @property
+    def view(self):
+        if self.view_started is None:
+            return 0.0
+        return (self.view_finished or self.finished) - self.view_started
+
+    @property
+    def render(self):
+        if self.view_finished is None:
+            return 0.0
+        return self.finished - self.view_finished
+
+    def get_duplicates(self):
+        """Запросы, выполненные больше одного раза, самые частые первыми."""
+        repeated = sorted(
+            ((count, sql) for sql, count in self.statements.items()
+             if count > 1),
+            reverse=True
+        )
+        return [
+            {
+                'fingerprint': fingerprint(sql),
+                'count': count,
+                'sql': sql[:SQL_PREVIEW_LENGTH],
+            }
+            for count, sql in repeated[:MAX_DUPLICATES]
+        ]
+
+    def get_server_timing(self):
+        duplicates = sum(
+            count - 1 for count in self.statements.values() if count > 1
+        )
+        metrics = (
+            ('total', self.total, None),
+            ('db', self.db,
+             f'queries={self.queries} duplicates={duplicates}'),
+            ('view', self.view, None),
+            ('serialize', self.serialize, None),
+            ('render', self.render, None),
+        )
+        return ', '.join(
+            f'{name};dur={duration * 1000:.2f}'
+            + (f';desc="{desc}"' if desc else '')
+            for name, duration, desc in metrics
+        )
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 2),
+            'db_ms': round(self.db * 1000, 2),
+            'queries': self.queries,
+            'view_ms': round(self.view * 1000, 2),
+            'serialize_ms': round(self.serialize * 1000, 2),
+            'render_ms': round(self.render * 1000, 2),
+            'duplicates': self.get_duplicates(),
+        }
+
+
+class TimedSerializerMixin:
+    """Считает время to_representation() в замерах текущего запроса.
+
+    Вложенные сериализаторы внутри уже замеряемого не засекаются
+    повторно. Запросы к базе, сделанные при сериализации (ленивые связи),
+    входят в это время.
+    """
+
+    def to_representation(self, instance):
+        timings = current_timings.get()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+        timings.serializing = True
+        started = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serialize += perf_counter() - started
+            timings.serializing = False
+
+
+class RequestInstrumentationMiddleware:
+    """Добавляет заголовок Server-Timing и пишет замеры запроса в лог.
+
+    Ставится первой в MIDDLEWARE, чтобы total включал остальные мидлвари.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings(request.path)
+        token = current_timings.set(timings)
+        metrics.requests_in_flight.inc()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+            metrics.requests_in_flight.dec()
+        timings.finished = perf_counter()
+        metrics.observe_request(
+            timings.view_name or 'unmatched', request.method,
+            response.status_code, timings
+        )
+        response['Server-Timing'] = timings.get_server_timing()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(
+                {
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    **timings.as_dict(),
+                },
+                ensure_ascii=False
+            ))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view_name = metrics.get_view_name(
+                view_func, request.method
+            )
+            timings.view_started = perf_counter()
+
+    def process_template_response(self, request, response):
+        # Вызывается сразу после вьюхи и до рендеринга ответа DRF.
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view_finished = perf_counter()
+        return response
@@ -0,0 +1,302 @@
+import json
+import platform
+import subprocess
+import tempfile
+from contextlib import nullcontext
+from io import StringIO
+
+import django
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmark import PERCENTILES, Route, run_route
+from reviews.models import Comment, Review, Title, User
+
+DEFAULT_SCALE = {
+    'titles': 10000,
+    'reviews': 200000,
+    'users': 5000,
+    'comments': 50000,
+}
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную тестовую базу синтетическими данными и '
+        'замеряет маршруты API: p50/p95/p99, число SQL-запросов и '
+        'прочитанных строк. Результат пишется в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для результатов.'
+        )
+        parser.add_argument(
+            '--compare', metavar='FILE',
+            help='Сравнить с результатами прошлого запуска.'
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--data', metavar='DIR',
+            help='Загрузить готовые CSV вместо генерации.'
+        )
+        for name, default in DEFAULT_SCALE.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--cache', action='store_true',
+            help='Замерять с кэшем ответов и COUNT(*). По умолчанию кэши '
+                 'выключены: иначе после первого вызова замеряются '
+                 'попадания в кэш, а не вьюхи и сериализаторы.'
+        )
+        parser.add_argument(
+            '--routes', nargs='+', metavar='NAME',
+            help='Замерить только перечисленные маршруты.'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['warmup'] < 0:
+            raise CommandError('Проверьте --iterations и --warmup')
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                previous = json.load(file)
+
+        # Замеры идут во временной базе, рабочая база не затрагивается.
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        caches = nullcontext()
+        if not options['cache']:
+            caches = override_settings(
+                COUNT_CACHE_TIMEOUT=0, RESPONSE_CACHE_TIMEOUT=0
+            )
+        try:
+            self.seed(options)
+            with caches:
+                report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f'>>> Результаты записаны в {options["output"]}')
+        if previous:
+            self.print_comparison(previous, report)
+
+    def seed(self, options):
+        quiet = StringIO()
+        if options['data']:
+            call_command(
+                'import_csv', path=options['data'], stream=True,
+                stdout=quiet, stderr=quiet
+            )
+            return
+        with tempfile.TemporaryDirectory() as path:
+            call_command(
+                'generate_csv', path, seed=options['seed'], stdout=quiet,
+                **{name: options[name] for name in DEFAULT_SCALE}
+            )
+            call_command(
+                'import_csv', path=path, stream=True,
+                stdout=quiet, stderr=quiet
+            )
+
+    def get_routes(self, total):
+        admin = User.objects.create_user(
+            username='bench_admin', email='bench_admin@yamdb.fake',
+            role='admin'
+        )
+        admin_token = str(AccessToken.for_user(admin))
+        title = Title.objects.order_by('-rating_count').first()
+        review = Review.objects.filter(title=title).order_by('id').first()
+        # Отзыв с наибольшим числом комментариев — худший случай для списка.
+        commented = Comment.objects.values('review_id').annotate(
+            total=Count('id')
+        ).order_by('-total').first()
+        if title is None or review is None or commented is None:
+            raise CommandError('В данных нет отзывов или комментариев')
+        commented_review = Review.objects.get(pk=commented['review_id'])
+        comment = commented_review.comments.order_by('id').first()
+
+        # Для получения токена нужен новый пользователь на каждый вызов.
+        User.objects.bulk_create(
+            User(username=f'bench_token_{index}',
+                 email=f'bench_token_{index}@yamdb.fake')
+            for index in range(total)
+        )
+        codes = [
+            (user.username, default_token_generator.make_token(user))
+            for user in User.objects.filter(
+                username__startswith='bench_token_'
+            ).order_by('id')
+        ]
+
+        reviews = f'/api/v1/titles/{title.id}/reviews/'
+        comments = (
+            f'/api/v1/titles/{commented_review.title_id}/reviews/'
+            f'{commented_review.id}/comments/'
+        )
+        # Новый администратор ещё не писал отзывов: каждый вызов создаёт
+        # отзыв к следующему произведению.
+        review_titles = list(
+            Title.objects.order_by('id').values_list('id', flat=True)[:total]
+        )
+        if len(review_titles) < total:
+            raise CommandError(
+                f'Для замера записи отзывов нужно {total} произведений'
+            )
+        category = title.category.slug if title.category else ''
+        genre = title.genre.values_list('slug', flat=True).first() or ''
+        return [
+            Route('titles_list', '/api/v1/titles/'),
+            Route('titles_list_cursor', '/api/v1/titles/', data={
+                'cursor': ''
+            }),
+            Route('titles_top_rated', '/api/v1/titles/', data={
+                'ordering': '-rating', 'limit': 10
+            }),
+            Route('titles_filter_genre', '/api/v1/titles/', data={
+                'genre': genre
+            }),
+            Route('titles_filter_category', '/api/v1/titles/', data={
+                'category': category
+            }),
+            Route('titles_filter_year', '/api/v1/titles/', data={
+                'year': title.year
+            }),
+            Route('titles_filter_name', '/api/v1/titles/', data={
+                'name': title.name.split()[0]
+            }),
+            Route('title_detail', f'/api/v1/titles/{title.id}/'),
+            Route('reviews_list', reviews),
+            Route('reviews_list_cursor', reviews, data={'cursor': ''}),
+            Route('review_detail', f'{reviews}{review.id}/'),
+            Route('comments_list', comments),
+            Route('comments_list_cursor', comments, data={'cursor': ''}),
+            Route('comment_detail', f'{comments}{comment.id}/'),
+            Route('categories_list', '/api/v1/categories/'),
+            Route('genres_list', '/api/v1/genres/'),
+            Route('users_list', '/api/v1/users/', token=admin_token),
+            Route('users_search', '/api/v1/users/', data={
+                'search': 'user1'
+            }, token=admin_token),
+            Route('user_detail', f'/api/v1/users/{admin.username}/',
+                  token=admin_token),
+            Route('users_me', '/api/v1/users/me/', token=admin_token),
+            Route('sync', '/api/v1/sync/'),
+            Route('changes', '/api/v1/changes/', token=admin_token),
+            Route('review_create',
+                  lambda index: (
+                      f'/api/v1/titles/{review_titles[index]}/reviews/'
+                  ),
+                  method='post', token=admin_token, status=201,
+                  data=lambda index: {'text': f'Отзыв {index}', 'score': 5}),
+            Route('review_update', f'{reviews}{review.id}/', method='patch',
+                  token=admin_token,
+                  data=lambda index: {'score': index % 10 + 1}),
+            Route('comment_create', comments, method='post',
+                  token=admin_token, status=201,
+                  data=lambda index: {'text': f'Комментарий {index}'}),
+            Route('comment_update', f'{comments}{comment.id}/',
+                  method='patch', token=admin_token,
+                  data=lambda index: {'text': f'Правка {index}'}),
+            Route('signup', '/api/v1/auth/signup/', method='post',
+                  data=lambda index: {
+                      'username': f'bench_signup_{index}',
+                      'email': f'bench_signup_{index}@yamdb.fake',
+                  }),
+            Route('token', '/api/v1/auth/token/', method='post',
+                  data=lambda index: {
+                      'username': codes[index][0],
+                      'confirmation_code': codes[index][1],
+                  }),
+        ]
+
+    def run(self, options):
+        total = options['warmup'] + options['iterations'] + 1
+        routes = self.get_routes(total)
+        if options['routes']:
+            unknown = set(options['routes']) - {
+                route.name for route in routes
+            }
+            if unknown:
+                raise CommandError(
+                    f'Неизвестные маршруты: {", ".join(sorted(unknown))}'
+                )
+            routes = [
+                route for route in routes if route.name in options['routes']
+            ]
+        results = {}
+        for route in routes:
+            results[route.name] = run_route(
+                route, options['iterations'], options['warmup']
+            )
+            self.print_result(route.name, results[route.name])
+        return {
+            'meta': {
+                'commit': get_commit(),
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'cache': options['cache'],
+                'data': options['data'] or {
+                    name: options[name]
+                    for name in (*DEFAULT_SCALE, 'seed')
+                },
+            },
+            'routes': results,
+        }
+
+    def print_result(self, name, result):
+        latency = ' '.join(
+            f'p{p}={result[f"p{p}_ms"]:.1f}' for p in PERCENTILES
+        )
+        self.stdout.write(
+            f'{name:<24} {latency} мс, запросов {result["queries"]}, '
+            f'строк {result["rows_read"]}'
+        )
+
+    def print_comparison(self, previous, report):
+        self.stdout.write(
+            f'Сравнение с {previous["meta"].get("commit") or "прошлым"}:'
+        )
+        for name, result in report['routes'].items():
+            old = previous['routes'].get(name)
+            if not old:
+                continue
+            changes = ' '.join(
+                '{}={:+.0%}'.format(
+                    key, result[key] / old[key] - 1 if old[key] else 0
+                )
+                for key in ('p50_ms', 'p95_ms', 'p99_ms')
+            )
+            self.stdout.write(
+                f'{name:<24} {changes}, запросов '
+                f'{old["queries"]} -> {result["queries"]}, строк '
+                f'{old["rows_read"]} -> {result["rows_read"]}'
+            )
@@ -0,0 +1,299 @@
+"""Метрики API в памяти процесса и их выдача в текстовом формате Prometheus.
+
+Значения обновляет RequestInstrumentationMiddleware. Если задан
+settings.METRICS_DIR, каждый процесс не чаще раза в FLUSH_INTERVAL секунд
+сохраняет свои значения в отдельный файл этого каталога, а эндпоинт
+/metrics складывает файлы всех процессов. Так метрики нескольких
+воркеров собираются без внешних агентов.
+"""
+import json
+import os
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+
+FLUSH_INTERVAL = 1.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+FILE_PREFIX = 'metrics_'
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        # {значения меток: значение}
+        self.values = {}
+
+    def empty(self):
+        return 0
+
+    def merge(self, current, value):
+        return current + value
+
+    def format(self, labels, value):
+        """Строки выдачи: (имя, имена меток, значения меток, значение)."""
+        yield self.name, self.labelnames, labels, value
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self.registry.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+        self.registry.changed()
+
+
+class Gauge(Metric):
+    """Значение процесса; при сложении учитываются только живые процессы."""
+    type = 'gauge'
+
+    def inc(self, labels=(), amount=1):
+        with self.registry.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+        self.registry.changed()
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    """Значение — список [счётчики корзин..., +Inf, сумма]."""
+    type = 'histogram'
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=()):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def empty(self):
+        return [0] * (len(self.buckets) + 2)
+
+    def merge(self, current, value):
+        return list(map(sum, zip(current, value)))
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = self.empty()
+            counts[index] += 1
+            counts[-1] += value
+        self.registry.changed()
+
+    def format(self, labels, value):
+        bucket_labelnames = self.labelnames + ('le',)
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), value):
+            total += count
+            yield (
+                f'{self.name}_bucket', bucket_labelnames,
+                labels + (format_value(bound),), total,
+            )
+        yield f'{self.name}_sum', self.labelnames, labels, value[-1]
+        yield f'{self.name}_count', self.labelnames, labels, total
+
+
+class Registry:
+
+    def __init__(self, directory=None):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.directory = directory
+        self.flush_timer = None
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        """После fork воркер начинает с нуля: значения родителя уже учтены
+        в его собственном файле, а таймер записи в дочерний процесс не
+        переходит."""
+        self.lock = threading.Lock()
+        self.flush_timer = None
+        for metric in self.metrics.values():
+            metric.values = {}
+
+    def register(self, metric_class, name, help, labelnames=(), **kwargs):
+        metric = metric_class(self, name, help, tuple(labelnames), **kwargs)
+        self.metrics[name] = metric
+        return metric
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [
+                    [list(labels), value]
+                    for labels, value in metric.values.items()
+                ]
+                for name, metric in self.metrics.items()
+            }
+
+    def changed(self):
+        # Файл пишется отложенно: не чаще раза в FLUSH_INTERVAL и даже
+        # если после изменения запросов больше не было.
+        if not self.directory or self.flush_timer is not None:
+            return
+        with self.lock:
+            if self.flush_timer is not None:
+                return
+            self.flush_timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+            self.flush_timer.daemon = True
+        self.flush_timer.start()
+
+    def flush(self):
+        """Сохраняет значения процесса в его файл в каталоге метрик."""
+        self.flush_timer = None
+        os.makedirs(self.directory, exist_ok=True)
+        filename = os.path.join(
+            self.directory, f'{FILE_PREFIX}{os.getpid()}.json'
+        )
+        temporary = f'{filename}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary, filename)
+
+    def read_other_processes(self):
+        """Снимки остальных процессов: [(процесс жив, снимок)]."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        snapshots = []
+        own = f'{FILE_PREFIX}{os.getpid()}.json'
+        for filename in os.listdir(self.directory):
+            if (
+                filename == own or not filename.startswith(FILE_PREFIX)
+                or not filename.endswith('.json')
+            ):
+                continue
+            pid = int(filename[len(FILE_PREFIX):-len('.json')])
+            try:
+                with open(os.path.join(self.directory, filename),
+                          encoding='utf-8') as file:
+                    snapshots.append((is_alive(pid), json.load(file)))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def collect(self):
+        """Значения, сложенные по всем процессам: {имя: {метки: значение}}."""
+        collected = {name: {} for name in self.metrics}
+        sources = [(True, self.snapshot())] + self.read_other_processes()
+        for alive, snapshot in sources:
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.type == 'gauge' and not alive):
+                    continue
+                merged = collected[name]
+                for labels, value in values:
+                    labels = tuple(labels)
+                    merged[labels] = metric.merge(
+                        merged.get(labels, metric.empty()), value
+                    )
+        return collected
+
+    def render(self):
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, value in sorted(values.items()):
+                lines.extend(
+                    f'{sample_name}{format_labels(labelnames, labels)} '
+                    f'{format_value(sample_value)}'
+                    for sample_name, labelnames, labels, sample_value
+                    in metric.format(labels, value)
+                )
+        return '\n'.join(lines) + '\n'
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value) if not value.is_integer() else str(int(value))
+    return str(value)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+registry = Registry(getattr(settings, 'METRICS_DIR', None))
+
+requests_total = registry.register(
+    Counter, 'api_requests_total', 'Число запросов к API.',
+    ('view', 'method', 'status'),
+)
+request_errors_total = registry.register(
+    Counter, 'api_request_errors_total',
+    'Число запросов, завершившихся ошибкой сервера (5xx).', ('view',),
+)
+request_duration = registry.register(
+    Histogram, 'api_request_duration_seconds',
+    'Время обработки запроса, секунды.', ('view',),
+    buckets=LATENCY_BUCKETS,
+)
+request_queries = registry.register(
+    Histogram, 'api_request_db_queries', 'Число SQL-запросов на запрос.',
+    ('view',), buckets=QUERY_BUCKETS,
+)
+request_db_duration = registry.register(
+    Histogram, 'api_request_db_duration_seconds',
+    'Время SQL-запросов на запрос, секунды.', ('view',),
+    buckets=LATENCY_BUCKETS,
+)
+requests_in_flight = registry.register(
+    Gauge, 'api_requests_in_flight', 'Запросы, обрабатываемые сейчас.',
+)
+
+
+def get_view_name(view_func, method):
+    """Имя для меток: `TitleViewSet.list`, `SignUpView.post`."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def observe_request(view, method, status, timings):
+    labels = (view,)
+    requests_total.inc((view, method, str(status)))
+    if status >= 500:
+        request_errors_total.inc(labels)
+    request_duration.observe(timings.total, labels)
+    request_queries.observe(timings.queries, labels)
+    request_db_duration.observe(timings.db, labels)
+
+
+def metrics_view(request):
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -1,8 +1,210 @@
-from rest_framework import filters, mixins, viewsets
+import hashlib
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+
+from reviews.models import VersionConflict
+from reviews.versions import (get_modified, get_version, get_versions,
+                              version_key)
 from .permissions import IsAdminUserOrReadOnly
 
 
+class KeysetPaginationMixin:
+    """Переключает вьюсет на keyset-пагинацию по параметру `cursor`."""
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, '_paginator')
+            and self.keyset_pagination_class is not None
+            and self.keyset_pagination_class.is_requested(self.request)
+        ):
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
+
+
+class CachedListMixin:
+    """Кэширует данные ответа list() до записи в таблицы cache_models.
+
+    Ключ — полный URL запроса, роль пользователя и версии таблиц
+    (reviews/versions.py), поэтому закэшированный ответ не устаревает:
+    после записи в любую из таблиц он просто перестаёт находиться.
+    Хранятся данные до рендеринга, так что формат ответа не важен.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout:
+            return super().list(request, *args, **kwargs)
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+        return response
+
+    def get_list_cache_key(self, request):
+        tables = [model._meta.db_table for model in self.cache_models]
+        role = getattr(request.user, 'role', 'anonymous')
+        digest = hashlib.md5('|'.join((
+            role, request.build_absolute_uri(), get_version(tables)
+        )).encode()).hexdigest()
+        return f'response:{type(self).__name__}:{digest}'
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified из версий таблиц, 304 без работы вьюхи.
+
+    Версии (reviews/versions.py), от которых зависит ответ, по умолчанию
+    берутся по таблицам cache_models; вьюсет может уточнить их в
+    get_version_keys(). Проверка If-None-Match и If-Modified-Since стоит
+    одного обращения к кэшу: если ответ не изменился, обработчик не
+    вызывается, и ни запросов к базе, ни сериализации нет.
+    """
+    conditional_actions = ('list',)
+
+    def get_version_keys(self):
+        models = getattr(self, 'cache_models', ())
+        if not models:
+            raise ImproperlyConfigured(
+                f'{type(self).__name__}: укажите cache_models или '
+                f'get_version_keys() для ETag.'
+            )
+        return [version_key(model) for model in models]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method not in ('GET', 'HEAD')
+            or self.action not in self.conditional_actions
+        ):
+            return
+        etag, last_modified = self.get_validators()
+        self.conditional_headers = {
+            'ETag': etag, 'Last-Modified': http_date(last_modified)
+        }
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            # dispatch() берёт обработчик после initial().
+            setattr(self, request.method.lower(),
+                    lambda *args, **kwargs: response)
+
+    def get_validators(self):
+        """ETag и Last-Modified (Unix, секунды) текущего ответа."""
+        request = self.request
+        versions = get_versions(self.get_version_keys())
+        etag = quote_etag(hashlib.md5('|'.join((
+            request.get_full_path(), request.accepted_media_type, *versions
+        )).encode()).hexdigest())
+        return etag, get_modified(versions)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        headers = getattr(self, 'conditional_headers', None)
+        if headers and response.status_code in (200, 304):
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = (
+        'Объект изменён другим запросом, получите его заново.'
+    )
+    default_code = 'precondition_failed'
+
+
+class OptimisticLockMixin:
+    """Изменение и удаление с заголовком `If-Match: "<version>"`.
+
+    Версия сверяется в самом UPDATE (VersionedModel), поэтому два
+    модератора, одновременно правящих одну запись, не затрут изменения
+    друг друга: второй получит 412. Без If-Match запись сохраняется как
+    раньше, версия всё равно увеличивается.
+
+    ETag ответов с одним объектом — его версия, так что клиент может
+    вернуть ETag из GET в If-Match. Ставится перед ConditionalGetMixin.
+    """
+    write_actions = ('create', 'update', 'partial_update')
+
+    def get_validators(self):
+        if self.action != 'retrieve':
+            return super().get_validators()
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        row = self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup]}
+        ).values_list('version', 'updated_at').first()
+        if row is None:
+            raise NotFound
+        version, updated_at = row
+        return quote_etag(str(version)), int(updated_at.timestamp())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (
+            self.action in self.write_actions
+            and response.status_code in (200, 201)
+            and isinstance(response.data, dict)
+            and 'version' in response.data
+        ):
+            response['ETag'] = quote_etag(str(response.data['version']))
+        return response
+
+    def get_expected_version(self):
+        header = self.request.headers.get('If-Match', '').strip()
+        if not header or header == '*':
+            return None
+        if header.startswith('W/'):
+            header = header[2:]
+        try:
+            return int(header.strip('"'))
+        except ValueError:
+            raise PreconditionFailed
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        # Связи, записанные после сохранения, тоже увеличивают версию.
+        serializer.instance.refresh_from_db(fields=('version',))
+
+    def perform_update(self, serializer):
+        serializer.instance.expected_version = self.get_expected_version()
+        try:
+            with transaction.atomic():
+                super().perform_update(serializer)
+        except VersionConflict:
+            raise PreconditionFailed
+        serializer.instance.refresh_from_db(fields=('version',))
+
+    def perform_destroy(self, instance):
+        expected = self.get_expected_version()
+        if expected is None:
+            return super().perform_destroy(instance)
+        with transaction.atomic():
+            deleted, _ = type(instance).objects.filter(
+                pk=instance.pk, version=expected
+            ).delete()
+        if not deleted:
+            raise PreconditionFailed
+
+
 class ListCreateDestroyViewSet(
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
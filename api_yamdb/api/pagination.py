@@ -0,0 +1,319 @@
+import binascii
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from reviews.versions import get_query_tables, get_version
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def get_count(queryset, limit=None):
+    """COUNT(*) запроса из кэша; (число, точно ли оно).
+
+    Ключ — текст запроса без сортировки и версии его таблиц, так что
+    запись в любую из них сбрасывает значение. С limit строки считаются
+    не дальше limit: если их больше, возвращается (limit, False).
+    """
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    timeout = settings.COUNT_CACHE_TIMEOUT
+    key = None
+    if timeout:
+        digest = hashlib.md5(f'{sql}|{params!r}|{limit}'.encode()).hexdigest()
+        key = f'count:{digest}:{get_version(get_query_tables(sql))}'
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    if limit is None:
+        result = queryset.count(), True
+    else:
+        count = queryset[:limit + 1].count()
+        result = min(count, limit), count <= limit
+    if key is not None:
+        cache.set(key, result, timeout)
+    return result
+
+
+def get_model_field(model, path):
+    """Поле модели по пути вида `search_index__rank`."""
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def get_beyond_filter(name, descending, value, nullable):
+    """Строки дальше value по полю name; None, если таких не бывает."""
+    if value is None:
+        # NULL — наименьшее значение.
+        return None if descending else Q(**{f'{name}__isnull': False})
+    lookup = 'lt' if descending else 'gt'
+    condition = Q(**{f'{name}__{lookup}': value})
+    if descending and nullable:
+        condition |= Q(**{f'{name}__isnull': True})
+    return condition
+
+
+def get_equal_filter(name, value):
+    if value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: value})
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки (keyset).
+
+    Ключ — сортировка запроса, заданная фильтрами (`?ordering=`,
+    релевантность поиска), или `ordering` по умолчанию, с id в конце.
+    Курсор хранит значения этих полей у крайней записи страницы,
+    следующая страница выбирается условием по индексу, без OFFSET и COUNT.
+    NULL считается меньше любого значения, как при сортировке в SQLite.
+    Включается, если в запросе передан параметр `cursor`
+    (для первой страницы — пустой).
+    """
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.active_ordering = self.get_ordering(queryset)
+        position, self.reverse = self.decode_cursor(request)
+
+        fields = [name.lstrip('-') for name in self.active_ordering]
+        model_fields = [get_model_field(queryset.model, name)
+                        for name in fields]
+        if position is not None:
+            position = self.to_python(model_fields, position)
+        descending = [name.startswith('-') for name in self.active_ordering]
+        if self.reverse:
+            descending = [not desc for desc in descending]
+        # Значения ключа нужны для курсора, в том числе у полей связанных
+        # таблиц (ранг поиска).
+        queryset = queryset.annotate(**{
+            f'keyset_{index}': F(name) for index, name in enumerate(fields)
+        }).order_by(*(
+            f'-{name}' if desc else name
+            for name, desc in zip(fields, descending)
+        ))
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(
+                fields, descending, position,
+                [field.null for field in model_fields]
+            ))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_ordering(self, queryset):
+        """Сортировка запроса без повторов полей, с id в конце."""
+        ordering, seen = [], set()
+        for name in queryset.query.order_by or self.ordering:
+            if name.lstrip('-') not in seen:
+                seen.add(name.lstrip('-'))
+                ordering.append(name)
+        if 'id' not in seen:
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_keyset_filter(self, fields, descending, position, nullable):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition = Q()
+        for index, (name, desc) in enumerate(zip(fields, descending)):
+            step = get_beyond_filter(
+                name, desc, position[index], nullable[index]
+            )
+            if step is None:
+                continue
+            for prev_name, prev_value in zip(fields[:index], position):
+                step &= get_equal_filter(prev_name, prev_value)
+            condition |= step
+        return condition
+
+    def to_python(self, model_fields, position):
+        try:
+            return [
+                field.to_python(value)
+                for field, value in zip(model_fields, position)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_position(self, instance):
+        position = []
+        for index in range(len(self.active_ordering)):
+            value = getattr(instance, f'keyset_{index}')
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = data['p']
+            reverse = bool(data.get('r'))
+            # Курсор от другой сортировки не подходит к этому запросу.
+            if data.get('o') != self.active_ordering:
+                raise ValueError
+            if len(position) != len(self.active_ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeError,
+                binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        data = {
+            'p': self.get_position(instance), 'o': self.active_ordering
+        }
+        if reverse:
+            data['r'] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class CountCachingPagination(LimitOffsetPagination):
+    """limit/offset с кэшированным и ограниченным COUNT(*).
+
+    Число записей берётся из get_count(). Параметр `count=false` отключает
+    подсчёт: в ответе count = null. Наличие следующей страницы
+    определяется по лишней записи в выборке, а не по count.
+    """
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        if self.is_count_requested(request):
+            self.count, self.count_exact = get_count(
+                queryset, settings.COUNT_LIMIT
+            )
+        else:
+            self.count, self.count_exact = None, False
+        if (
+            self.count_exact and self.count > self.limit
+            and self.template is not None
+        ):
+            self.display_page_controls = True
+        if self.count == 0:
+            self.has_next = False
+            return []
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def is_count_requested(self, request):
+        value = request.query_params.get(self.count_query_param, '')
+        return value.lower() not in FALSE_VALUES
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'count_exact': self.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        properties = response_schema['properties']
+        properties['count']['nullable'] = True
+        properties['count_exact'] = {'type': 'boolean'}
+        return response_schema
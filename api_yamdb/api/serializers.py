@@ -4,37 +4,40 @@ from django.core.validators import RegexValidator
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.changelog import DEFAULT_LIMIT, MAX_LIMIT
+from reviews.models import (Category, ChangeLogEntry, Comment, Genre, Review,
+                            Title, User)
 from reviews.validators import validate_username
+from .instrumentation import TimedSerializerMixin
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
-        exclude = ('id', )
+        exclude = ('id', 'updated_at')
         model = Category
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
-        exclude = ('id', )
+        exclude = ('id', 'updated_at')
         model = Genre
         lookup_field = 'slug'
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True)
 
     class Meta:
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'updated_at')
         model = Title
 
 
-class TitleWriteSerializer(serializers.ModelSerializer):
+class TitleWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
         queryset=Category.objects.all(),
         slug_field='slug'
@@ -46,7 +49,7 @@ class TitleWriteSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'rating', 'updated_at')
         model = Title
 
 
@@ -112,7 +115,7 @@ class RetrieveUpdateUserSerializer(serializers.ModelSerializer):
         read_only_fields = ('role',)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.RegexField(
         regex=r'^[\w.@+-]+\Z',
         required=True,
@@ -158,14 +161,14 @@ class UserTokenSerializer(serializers.ModelSerializer):
         fields = ('username', 'confirmation_code')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
 
     class Meta:
         model = Review
-        exclude = ('title',)
+        exclude = ('title', 'updated_at')
 
     def validate(self, data):
         user = self.context.get("request").user
@@ -177,18 +180,83 @@ class ReviewSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = ('updated_at',)
         model = Comment
         read_only_fields = ('review',)
 
 
-class SignUpSerializer(serializers.Serializer):
+class CategorySyncSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ('id', 'name', 'slug', 'updated_at')
+        model = Category
+
+
+class GenreSyncSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ('id', 'name', 'slug', 'updated_at')
+        model = Genre
+
+
+class TitleSyncSerializer(serializers.ModelSerializer):
+    """Связи — по id: категории и жанры приходят в том же ответе."""
+    rating = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        exclude = ('rating_sum', 'rating_count')
+        model = Title
+
+
+class ReviewSyncSerializer(serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(
+        read_only=True, slug_field='username'
+    )
+
+    class Meta:
+        fields = '__all__'
+        model = Review
+
+
+class CommentSyncSerializer(serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(
+        read_only=True, slug_field='username'
+    )
+
+    class Meta:
+        fields = '__all__'
+        model = Comment
+
+
+class ChangeLogEntrySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ('id', 'model', 'object_id', 'action', 'created_at')
+        model = ChangeLogEntry
+
+
+class ChangeLogQuerySerializer(serializers.Serializer):
+    after = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_LIMIT, default=DEFAULT_LIMIT
+    )
+    model = serializers.CharField(required=False)
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_LIMIT, default=DEFAULT_LIMIT
+    )
+
+
+class SignUpSerializer(TimedSerializerMixin, serializers.Serializer):
     username = serializers.CharField(
         max_length=settings.USERNAME_LENGTH,
         validators=(validate_username,),
@@ -220,7 +288,7 @@ class SignUpSerializer(serializers.Serializer):
         return data
 
 
-class NotAdminSerializer(serializers.ModelSerializer):
+class NotAdminSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -0,0 +1,147 @@
+"""Журнал медленных SQL-запросов с планом выполнения.
+
+Обёртка ставится на каждое соединение с базой (сигнал connection_created),
+поэтому ловит запросы не только API, но и команд управления. Запрос дольше
+settings.SLOW_QUERY_MS (по умолчанию журнал выключен) попадает в лог
+`api.slow_queries` вместе с параметрами, вьюхой, полем сериализатора, во
+время вывода которого он выполнен, и планом EXPLAIN QUERY PLAN. Для
+быстрых запросов цена — два вызова perf_counter().
+
+Параметры запросов к таблице пользователей (хэши паролей, почта, коды
+подтверждения) в журнал не пишутся, длинные списки параметров и SQL
+массовых вставок обрезаются.
+"""
+import json
+import logging
+import sys
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.serializers import BaseSerializer
+
+from .instrumentation import current_timings
+
+logger = logging.getLogger('api.slow_queries')
+
+# Для каких запросов снимается план. EXPLAIN (без ANALYZE) сам запрос
+# не выполняет, поэтому изменяющие запросы тоже безопасны. У INSERT ...
+# VALUES плана нет, а массовые вставки — это тысячи параметров.
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+# Сколько параметров и символов SQL или параметра попадает в запись.
+MAX_PARAMS = 20
+MAX_PARAM_LENGTH = 200
+MAX_SQL_LENGTH = 2000
+REDACTED = '<скрыто>'
+
+
+def truncate(value, limit):
+    if len(value) <= limit:
+        return value
+    return f'{value[:limit]}... ({len(value)} символов)'
+
+
+def get_logged_params(sql, params):
+    """Параметры для журнала: без данных пользователей и не слишком много."""
+    params = list(params or ())
+    if get_user_model()._meta.db_table in sql:
+        return [REDACTED] * min(len(params), MAX_PARAMS)
+    return [
+        truncate(param, MAX_PARAM_LENGTH) if isinstance(param, str)
+        else param
+        for param in params[:MAX_PARAMS]
+    ]
+
+
+def find_serializer_field():
+    """Сериализатор и поле, которые сейчас выводятся, по стеку вызовов.
+
+    Стек разбирается только для медленных запросов, поэтому обычные
+    запросы за это не платят.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_name == 'to_representation':
+            serializer = frame.f_locals.get('self')
+            field = frame.f_locals.get('field')
+            if isinstance(serializer, BaseSerializer) and field is not None:
+                return type(serializer).__name__, field.field_name
+        frame = frame.f_back
+    return None, None
+
+
+def explain(connection, sql, params):
+    """План запроса строками или сообщение, почему его не получить."""
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail): вложенность по parent.
+        depth = {0: 0}
+        plan = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, 0) + 1
+            plan.append('  ' * (depth[node] - 1) + detail)
+        return plan
+    return [' '.join(map(str, row)) for row in rows]
+
+
+class SlowQueryLog:
+    """execute_wrapper, записывающий медленные запросы в лог."""
+
+    def __init__(self):
+        # Флаг на поток: EXPLAIN сам проходит через обёртку соединения.
+        self.local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self.local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - started
+            threshold = settings.SLOW_QUERY_MS
+            if threshold is not None and elapsed * 1000 >= threshold:
+                self.record(context['connection'], sql, params, many,
+                            elapsed)
+
+    def record(self, connection, sql, params, many, elapsed):
+        serializer, field = find_serializer_field()
+        timings = current_timings.get()
+        first_params = params[0] if many and params else params
+        entry = {
+            'duration_ms': round(elapsed * 1000, 2),
+            'sql': truncate(sql, MAX_SQL_LENGTH),
+            'params': get_logged_params(sql, first_params),
+            'params_total': len(first_params or ()),
+            'many': many,
+            'view': timings.view_name if timings else None,
+            'path': timings.path if timings else None,
+            'serializer': serializer,
+            'field': field,
+        }
+        if not many and sql.lstrip().upper().startswith(EXPLAINABLE):
+            self.local.explaining = True
+            try:
+                entry['plan'] = explain(connection, sql, params)
+            finally:
+                self.local.explaining = False
+        logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+slow_query_log = SlowQueryLog()
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик connection_created: вешает журнал на соединение."""
+    if slow_query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_log)
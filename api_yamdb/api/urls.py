@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
-from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       GetTokenView, ReviewViewSet, SignUpView, TitleViewSet,
-                       UserViewSet)
+from api.views import (CategoryViewSet, ChangeLogView, CommentViewSet,
+                       GenreViewSet, GetTokenView, ReviewViewSet, SignUpView,
+                       SyncView, TitleViewSet, UserViewSet)
 apps_name = 'api'
 
 
@@ -23,5 +23,7 @@ router.register(
 urlpatterns = [
     path('v1/auth/signup/', SignUpView.as_view(), name='signup'),
     path('v1/auth/token/', GetTokenView.as_view(), name='token'),
+    path('v1/sync/', SyncView.as_view(), name='sync'),
+    path('v1/changes/', ChangeLogView.as_view(), name='changes'),
     path('', include(router.urls))
 ]
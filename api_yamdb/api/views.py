@@ -1,7 +1,6 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -12,20 +11,30 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import AccessToken
 
-from api.filter import TitleFilter
-from reviews.models import Category, Genre, Review, Title, User
-from .mixins import ListCreateDestroyViewSet
+from api.filter import StableOrderingFilter, TitleFilter
+from reviews.changelog import read_changes
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleSearch, User)
+from reviews.versions import version_key
+from .mixins import (CachedListMixin, ConditionalGetMixin,
+                     KeysetPaginationMixin, ListCreateDestroyViewSet,
+                     OptimisticLockMixin)
+from .pagination import PubDateKeysetPagination, TitleKeysetPagination
 from .permissions import (AdminModeratorAuthorPermission, AdminOnly,
                           IsAdminUserOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
+from .serializers import (CategorySerializer, ChangeLogEntrySerializer,
+                          ChangeLogQuerySerializer, CommentSerializer,
                           GenreSerializer, GetTokenSerializer,
                           NotAdminSerializer, ReviewSerializer,
-                          SignUpSerializer, TitleReadSerializer,
-                          TitleWriteSerializer, UserSerializer)
+                          SignUpSerializer, SyncQuerySerializer,
+                          TitleReadSerializer, TitleWriteSerializer,
+                          UserSerializer)
+from .sync import decode_token, get_changes
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
+    list_query_budget = 2
     serializer_class = UserSerializer
     lookup_field = 'username'
     permission_classes = (IsAuthenticated, AdminOnly,)
@@ -61,18 +70,32 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(updated_serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedListMixin,
+                      ListCreateDestroyViewSet):
     queryset = Category.objects.all()
+    cache_models = (Category,)
+    list_query_budget = 2
     serializer_class = CategorySerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all()
+class TitleViewSet(OptimisticLockMixin, ConditionalGetMixin, CachedListMixin,
+                   KeysetPaginationMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    )
+    # Рейтинг меняется вместе с отзывами, а не сохранением Title.
+    cache_models = (Title, Category, Genre, Title.genre.through, Review,
+                    TitleSearch)
+    # Сколько SQL-запросов может сделать list() при любом размере
+    # страницы; проверяется в tests/test_15_query_budget.py.
+    list_query_budget = 3
+    keyset_pagination_class = TitleKeysetPagination
     permission_classes = (IsAdminUserOrReadOnly,)
-    filter_backends = (DjangoFilterBackend, )
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'year', 'name')
+    conditional_actions = ('retrieve',)
+    lookup_value_regex = r'\d+'
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
@@ -80,36 +103,60 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitleWriteSerializer
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(ConditionalGetMixin, CachedListMixin,
+                   ListCreateDestroyViewSet):
     queryset = Genre.objects.all()
+    cache_models = (Genre,)
+    list_query_budget = 2
     serializer_class = GenreSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(OptimisticLockMixin, ConditionalGetMixin,
+                    KeysetPaginationMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    keyset_pagination_class = PubDateKeysetPagination
     permission_classes = (AdminModeratorAuthorPermission, )
+    list_query_budget = 3
+    conditional_actions = ('list', 'retrieve')
 
     def get_queryset(self):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        queryset = title.reviews.all()
+        queryset = title.reviews.select_related('author')
         return queryset
 
+    def get_version_keys(self):
+        # Имена авторов: версия меняется только при смене username.
+        return [
+            version_key(Review, title=int(self.kwargs['title_id'])),
+            version_key(User, field='username'),
+        ]
+
     def perform_create(self, serializer):
         title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(OptimisticLockMixin, ConditionalGetMixin,
+                     KeysetPaginationMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    keyset_pagination_class = PubDateKeysetPagination
     permission_classes = [
         AdminModeratorAuthorPermission
     ]
+    list_query_budget = 3
+    conditional_actions = ('list', 'retrieve')
 
     def get_queryset(self):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        queryset = review.comments.all()
+        queryset = review.comments.select_related('author')
         return queryset
 
+    def get_version_keys(self):
+        return [
+            version_key(Comment, review=int(self.kwargs['review_id'])),
+            version_key(User, field='username'),
+        ]
+
     def perform_create(self, serializer):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
         serializer.save(author=self.request.user, review=review)
@@ -170,3 +217,37 @@ class SignUpView(APIView):
                 )
         self.send_confirmation_code(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SyncView(APIView):
+    """Изменения каталога, отзывов и комментариев после токена since."""
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        query = SyncQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since = query.validated_data.get('since')
+        return Response(get_changes(
+            decode_token(since) if since else None,
+            query.validated_data['limit']
+        ))
+
+
+class ChangeLogView(APIView):
+    """Журнал изменений с номера after: для фоновых обработчиков."""
+    permission_classes = (IsAuthenticated, AdminOnly)
+
+    def get(self, request):
+        query = ChangeLogQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        models = params.get('model')
+        entries = read_changes(
+            params['after'],
+            params['limit'],
+            models.split(',') if models else None
+        )
+        return Response({
+            'next': entries[-1].id if entries else params['after'],
+            'results': ChangeLogEntrySerializer(entries, many=True).data,
+        })
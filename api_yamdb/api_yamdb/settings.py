@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -116,12 +117,113 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.LimitOffsetPagination',
+        'api.pagination.CountCachingPagination',
     'PAGE_SIZE': 10,
 }
 
 AUTH_USER_MODEL = 'reviews.User'
 
+# С несколькими воркерами кэш должен быть общим: версии таблиц
+# (reviews/versions.py) в LocMemCache у каждого воркера свои, и запись в
+# одном воркере другие увидят только после истечения TABLE_VERSION_TIMEOUT.
+# CACHE_DIR включает файловый кэш, который воркеры одного сервера делят
+# без отдельного сервиса.
+CACHE_DIR = os.environ.get('CACHE_DIR')
+if CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+
+# Сколько секунд живёт версия таблицы, если в таблицу не пишут; пустое
+# значение — бессрочно. В кэше процесса это предел, через который другие
+# воркеры увидят запись; в общем кэше запись видна сразу, и версии хранятся
+# бессрочно, чтобы ETag и кэши не сбрасывались без записей.
+TABLE_VERSION_TIMEOUT = os.environ.get(
+    'TABLE_VERSION_TIMEOUT', '' if CACHE_DIR else '10'
+)
+TABLE_VERSION_TIMEOUT = (
+    int(TABLE_VERSION_TIMEOUT) if TABLE_VERSION_TIMEOUT else None
+)
+
+# Сколько секунд хранятся ответы списков категорий, жанров и произведений;
+# 0 отключает кэш. Запись в связанные таблицы сбрасывает его сразу.
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', '600'))
+
+# /api/v1/sync/ отдаёт строки не моложе стольких секунд: дольше не должна
+# длиться транзакция записи, иначе её строки окажутся позади токена.
+SYNC_DELAY = float(os.environ.get('SYNC_DELAY', '1'))
+
+# Поток событий /api/v1/titles/<id>/events/ (только под ASGI): как часто
+# наблюдатель процесса читает журнал изменений и через сколько секунд
+# тишины клиенту уходит пустой комментарий, чтобы прокси не рвал связь.
+EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', '1'))
+EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', '15'))
+# Сколько записей журнала можно пропустить и получить их при
+# переподключении; если больше — клиенту уходит событие reset.
+EVENTS_REPLAY_LIMIT = int(os.environ.get('EVENTS_REPLAY_LIMIT', '1000'))
+
+# Сколько секунд хранится COUNT(*) списков; 0 отключает кэш.
+COUNT_CACHE_TIMEOUT = int(os.environ.get('COUNT_CACHE_TIMEOUT', '300'))
+# Если задан, списки считаются не дальше этого числа строк, а в ответе
+# count_exact = false; пустое значение — считать всегда точно.
+COUNT_LIMIT = os.environ.get('COUNT_LIMIT', '')
+COUNT_LIMIT = int(COUNT_LIMIT) if COUNT_LIMIT else None
+
+# Каталог, через который воркеры складывают метрики для /metrics.
+# Без него эндпоинт показывает только метрики своего процесса.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+
+# Запросы дольше этого порога (мс) пишутся в журнал медленных запросов
+# с планом выполнения; пустое значение (по умолчанию) отключает журнал.
+SLOW_QUERY_MS = os.environ.get('SLOW_QUERY_MS', '')
+SLOW_QUERY_MS = float(SLOW_QUERY_MS) if SLOW_QUERY_MS else None
+SLOW_QUERY_LOG = os.environ.get(
+    'SLOW_QUERY_LOG', os.path.join(BASE_DIR, 'slow_queries.log')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        # Замеры запросов от api.instrumentation, одна JSON-строка на запрос.
+        'api.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Медленные запросы от api.slow_queries.
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
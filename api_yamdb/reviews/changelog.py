@@ -0,0 +1,62 @@
+"""Журнал изменений моделей reviews как поток событий.
+
+Каждое создание, изменение и удаление категории, жанра, произведения,
+отзыва или комментария добавляет ChangeLogEntry в той же транзакции.
+Потребители (поисковый индекс, кэши, аналитика) хранят номер последней
+обработанной записи и читают журнал с него через read_changes() или
+/api/v1/changes/?after=<номер>, не просматривая таблицы заново.
+
+Номер — автоинкремент id. На SQLite записи фиксируются по одной, и
+номера видны строго по порядку; на СУБД с параллельными транзакциями
+меньший номер может стать виден позже большего.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (Category, ChangeLogEntry, Comment, Genre, Review,
+                     Title)
+
+LOGGED_MODELS = (Category, Genre, Title, Review, Comment)
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+BATCH_SIZE = 1000
+
+
+def log_changes(model, object_ids, action):
+    """Записывает в журнал одно действие для нескольких объектов.
+
+    Нужна для массовых update() и загрузки CSV, которые идут мимо
+    сигналов.
+    """
+    label = model._meta.label_lower
+    ChangeLogEntry.objects.bulk_create(
+        [
+            ChangeLogEntry(model=label, object_id=object_id, action=action)
+            for object_id in object_ids
+        ],
+        batch_size=BATCH_SIZE
+    )
+
+
+def touch(model, object_ids):
+    """Отмечает изменение объектов, которые пишутся без save().
+
+    Нужна, когда меняется их представление в API: рейтинг, жанры,
+    название категории, имя автора. Растут updated_at и version, в журнал
+    пишется изменение.
+    """
+    model.objects.filter(pk__in=object_ids).update(
+        updated_at=timezone.now(), version=F('version') + 1
+    )
+    log_changes(model, object_ids, ChangeLogEntry.UPDATE)
+
+
+def read_changes(after=0, limit=DEFAULT_LIMIT, models=None):
+    """Записи с номером больше after по возрастанию номера.
+
+    models — метки моделей (`reviews.title`), чтобы читать не всё.
+    """
+    entries = ChangeLogEntry.objects.filter(id__gt=after)
+    if models:
+        entries = entries.filter(model__in=models)
+    return list(entries.order_by('id')[:limit])
@@ -0,0 +1,342 @@
+"""Описание CSV-файлов с данными из static/data.
+
+Файлы перечислены в порядке зависимостей: таблица загружается только
+после тех, на которые ссылаются её внешние ключи.
+"""
+import csv
+import gzip
+import io
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .csv_validation import get_column_checks
+from .models import Category, Comment, Genre, Review, Title, User
+
+DATA_DIR = settings.BASE_DIR / 'static' / 'data'
+GZIP_SUFFIX = '.gz'
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class IdSet:
+    """Компактное множество неотрицательных целых id (битовая карта).
+
+    Миллион id занимает около 125 КБ вместо десятков мегабайт у set().
+    """
+
+    def __init__(self, ids=()):
+        self.bits = bytearray()
+        self.size = 0
+        self.update(ids)
+
+    def add(self, value):
+        if value < 0:
+            raise ValueError(f'Отрицательный id: {value}')
+        byte, bit = divmod(value, 8)
+        missing = byte + 1 - len(self.bits)
+        if missing > 0:
+            # Растим с запасом, чтобы не копировать массив на каждом id.
+            self.bits.extend(bytes(max(missing, len(self.bits))))
+        if not self.bits[byte] & (1 << bit):
+            self.bits[byte] |= 1 << bit
+            self.size += 1
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value):
+        if value is None:
+            return False
+        byte, bit = divmod(value, 8)
+        return (
+            0 <= byte < len(self.bits) and bool(self.bits[byte] & (1 << bit))
+        )
+
+    def __len__(self):
+        return self.size
+
+
+class CsvSource:
+    """Соответствие колонок CSV-файла полям модели."""
+
+    def __init__(self, filename, model, columns, foreign_keys=None):
+        self.filename = filename
+        self.model = model
+        # {колонка CSV: attname поля модели}
+        self.columns = columns
+        # {attname внешнего ключа: модель, на которую он ссылается}
+        self.foreign_keys = foreign_keys or {}
+        self.fields = {
+            column: model._meta.get_field(attname)
+            for column, attname in columns.items()
+        }
+
+    def __str__(self):
+        return self.filename
+
+    @cached_property
+    def column_checks(self):
+        return get_column_checks(self)
+
+    def to_python(self, row):
+        """Приводит строку CSV к словарю {attname: значение}."""
+        values = {}
+        for column, field in self.fields.items():
+            value = row[column]
+            if value == '' and field.null:
+                value = None
+            elif value != '' or not field.empty_strings_allowed:
+                value = field.to_python(value)
+            values[field.attname] = value
+        return values
+
+    def to_model(self, row):
+        return self.model(**self.to_python(row))
+
+    def get_insert_sql(self, connection):
+        """INSERT по всем колонкам таблицы для executemany()."""
+        quote = connection.ops.quote_name
+        fields = self.model._meta.concrete_fields
+        return 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(self.model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+
+    @cached_property
+    def auto_now_fields(self):
+        """Поля auto_now, которых нет в CSV: при загрузке строки в них
+        пишется текущее время, как при сохранении через ORM."""
+        attnames = set(self.columns.values())
+        return [
+            field for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+            and field.attname not in attnames
+        ]
+
+    def get_db_defaults(self, connection):
+        """Значения для колонок, которых нет в CSV."""
+        attnames = set(self.columns.values())
+        now = timezone.now()
+        return {
+            field.attname: field.get_db_prep_save(
+                now if field in self.auto_now_fields else field.get_default(),
+                connection
+            )
+            for field in self.model._meta.concrete_fields
+            if field.attname not in attnames
+        }
+
+    @cached_property
+    def is_versioned(self):
+        """Есть ли у модели version для If-Match (VersionedModel)."""
+        return any(
+            field.name == 'version'
+            for field in self.model._meta.concrete_fields
+        )
+
+    def get_update_sql(self, connection):
+        """UPDATE по колонкам из CSV, pk передаётся последним параметром.
+
+        version увеличивается, как при save(): иначе If-Match со старой
+        версией прошёл бы после перезаписи строки импортом.
+        """
+        quote = connection.ops.quote_name
+        assignments = [
+            f'{quote(field.column)} = %s' for field in self.update_fields
+        ]
+        if self.is_versioned:
+            column = quote('version')
+            assignments.append(f'{column} = {column} + 1')
+        return 'UPDATE {} SET {} WHERE {} = %s'.format(
+            quote(self.model._meta.db_table),
+            ', '.join(assignments),
+            quote(self.model._meta.pk.column),
+        )
+
+    @property
+    def update_fields(self):
+        """Поля, которые перезаписывает upsert: из CSV и auto_now."""
+        return [
+            field for field in self.fields.values() if not field.primary_key
+        ] + self.auto_now_fields
+
+    @property
+    def data_attnames(self):
+        """Поля из CSV кроме pk, по ним сравниваются строки при upsert."""
+        return [
+            field.attname for field in self.fields.values()
+            if not field.primary_key
+        ]
+
+    def to_db_update_row(self, values, connection):
+        """Параметры для get_update_sql()."""
+        now = timezone.now()
+        params = [
+            field.get_db_prep_save(values.get(field.attname, now), connection)
+            for field in self.update_fields
+        ]
+        params.append(values[self.model._meta.pk.attname])
+        return params
+
+    def to_db_row(self, values, defaults, connection):
+        """Кортеж значений для get_insert_sql() без создания модели."""
+        return tuple(
+            field.get_db_prep_save(values[field.attname], connection)
+            if field.attname in values else defaults[field.attname]
+            for field in self.model._meta.concrete_fields
+        )
+
+
+def find_data_file(path, filename):
+    """Путь к файлу данных: сжатый .csv.gz используется, если нет .csv."""
+    plain = path / filename
+    if plain.exists():
+        return plain
+    compressed = path / (filename + GZIP_SUFFIX)
+    if compressed.exists():
+        return compressed
+    return None
+
+
+def open_binary(filename):
+    if str(filename).endswith(GZIP_SUFFIX):
+        return gzip.open(filename, 'rb')
+    return open(filename, 'rb')
+
+
+def open_for_write(filename):
+    """Текстовый файл для csv.writer с крупным буфером, при .gz — сжатый."""
+    if str(filename).endswith(GZIP_SUFFIX):
+        raw = io.BufferedWriter(
+            gzip.GzipFile(filename, 'wb', compresslevel=6),
+            buffer_size=WRITE_BUFFER_SIZE
+        )
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    return open(
+        filename, 'w', encoding='utf-8', newline='',
+        buffering=WRITE_BUFFER_SIZE
+    )
+
+
+def read_header(filename):
+    with open_binary(filename) as file:
+        lines = (raw.decode('utf-8-sig') for raw in file)
+        return next(csv.reader(lines), [])
+
+
+def read_csv(filename, offset=0, line=0, end=None):
+    """Читает CSV, отдавая (строка, смещение, номер строки в файле).
+
+    Смещение в байтах указывает на начало следующей записи: с него можно
+    продолжить чтение, передав его вместе с номером строки в offset и line.
+    Если задан end, чтение останавливается на записи, начинающейся с него.
+    Для .gz смещения считаются в распакованных данных.
+    """
+    with open_binary(filename) as file:
+        position = 0
+
+        def lines():
+            nonlocal position
+            for raw in file:
+                position += len(raw)
+                yield raw.decode('utf-8')
+
+        reader = csv.reader(lines())
+        header = next(reader, None)
+        if header is None:
+            return
+        header[0] = header[0].lstrip('\ufeff')
+        line_shift = 0
+        if offset:
+            file.seek(offset)
+            position = offset
+            line_shift = line - reader.line_num
+        while end is None or position < end:
+            values = next(reader, None)
+            if values is None:
+                break
+            if values:
+                yield (
+                    dict(zip(header, values)),
+                    position,
+                    reader.line_num + line_shift,
+                )
+
+
+def split_csv(filename, chunk_size, offset=0, line=0):
+    """Делит CSV на куски около chunk_size байт по границам записей.
+
+    Отдаёт (начало, конец, номер строки перед началом), как минимум один
+    кусок, возможно пустой. Перевод строки внутри кавычек границей
+    записи не считается, поэтому многострочные тексты не разрываются.
+    """
+    with open_binary(filename) as file:
+        position = current_line = 0
+        quoted = False
+        for raw in file:
+            position += len(raw)
+            current_line += 1
+            quoted ^= raw.count(b'"') % 2 == 1
+            if not quoted:
+                break
+        if offset:
+            file.seek(offset)
+            position, current_line = offset, line
+        start, start_line = position, current_line
+        chunks = 0
+        for raw in file:
+            position += len(raw)
+            current_line += 1
+            quoted ^= raw.count(b'"') % 2 == 1
+            if not quoted and position - start >= chunk_size:
+                yield start, position, start_line
+                start, start_line = position, current_line
+                chunks += 1
+        if position > start or not chunks:
+            yield start, position, start_line
+
+
+CSV_SOURCES = (
+    CsvSource(
+        'category.csv', Category,
+        {'id': 'id', 'name': 'name', 'slug': 'slug'},
+    ),
+    CsvSource(
+        'genre.csv', Genre,
+        {'id': 'id', 'name': 'name', 'slug': 'slug'},
+    ),
+    CsvSource(
+        'titles.csv', Title,
+        {'id': 'id', 'name': 'name', 'year': 'year',
+         'category': 'category_id'},
+        foreign_keys={'category_id': Category},
+    ),
+    CsvSource(
+        'users.csv', User,
+        {'id': 'id', 'username': 'username', 'email': 'email',
+         'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+         'last_name': 'last_name'},
+    ),
+    CsvSource(
+        'genre_title.csv', Title.genre.through,
+        {'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'},
+        foreign_keys={'title_id': Title, 'genre_id': Genre},
+    ),
+    CsvSource(
+        'review.csv', Review,
+        {'id': 'id', 'title_id': 'title_id', 'text': 'text',
+         'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date'},
+        foreign_keys={'title_id': Title, 'author_id': User},
+    ),
+    CsvSource(
+        'comments.csv', Comment,
+        {'id': 'id', 'review_id': 'review_id', 'text': 'text',
+         'author': 'author_id', 'pub_date': 'pub_date'},
+        foreign_keys={'review_id': Review, 'author_id': User},
+    ),
+)
+
+SOURCES_BY_FILENAME = {source.filename: source for source in CSV_SOURCES}
@@ -0,0 +1,173 @@
+"""Проверка загружаемых из CSV значений целыми колонками.
+
+bulk_create не вызывает валидаторы полей, а full_clean() для каждого
+объекта слишком медленный на больших дампах. Здесь валидаторы полей
+модели переведены в операции над колонкой пачки: map() с функциями из
+operator и скомпилированными регулярными выражениями проходит колонку
+на C, а на уровне Python перебираются только отклонённые строки.
+"""
+import operator
+import re
+from itertools import compress, repeat
+
+from django.core import validators
+from django.utils import timezone
+
+from .validators import validate_username, validate_year
+
+USERNAME_CHARS = re.compile(r'[a-zA-Z0-9\-_.]*')
+
+
+def check_year(column):
+    return map(operator.le, column, repeat(timezone.now().year))
+
+
+def check_username(column):
+    return map(
+        operator.and_,
+        map(bool, map(USERNAME_CHARS.fullmatch, column)),
+        map(operator.ne, map(str.lower, column), repeat('me')),
+    )
+
+
+# Собственные валидаторы проекта и их колоночные версии.
+COLUMN_VALIDATORS = {
+    validate_year: (check_year, 'год не может быть больше текущего'),
+    validate_username: (check_username, 'недопустимое имя пользователя'),
+}
+
+
+def get_limit(validator):
+    limit = validator.limit_value
+    return limit() if callable(limit) else limit
+
+
+def format_message(validator, limit=None):
+    return str(validator.message) % {'limit_value': limit, 'show_value': ''}
+
+
+def make_check(validator):
+    """Колоночная версия валидатора: (функция, сообщение) или None."""
+    # Валидаторы Django нехешируемые, поэтому сравниваем по ссылке.
+    for known, check in COLUMN_VALIDATORS.items():
+        if validator is known:
+            return check
+    if isinstance(validator, (validators.MinValueValidator,
+                              validators.MaxValueValidator)):
+        limit = get_limit(validator)
+        compare = (
+            operator.ge
+            if isinstance(validator, validators.MinValueValidator)
+            else operator.le
+        )
+        return (
+            lambda column: map(compare, column, repeat(limit)),
+            format_message(validator, limit),
+        )
+    if isinstance(validator, (validators.MinLengthValidator,
+                              validators.MaxLengthValidator)):
+        limit = get_limit(validator)
+        compare = (
+            operator.ge
+            if isinstance(validator, validators.MinLengthValidator)
+            else operator.le
+        )
+        return (
+            lambda column: map(compare, map(len, column), repeat(limit)),
+            format_message(validator, limit),
+        )
+    if isinstance(validator, validators.RegexValidator):
+        search = validator.regex.search
+        matches = operator.not_ if validator.inverse_match else bool
+        return (
+            lambda column: map(matches, map(search, column)),
+            format_message(validator),
+        )
+    # Остальные валидаторы (например, email) колонкой не проверяются.
+    return None
+
+
+def make_choices_check(field):
+    allowed = {value for value, _ in field.flatchoices}
+    return (
+        lambda column: map(allowed.__contains__, column),
+        'недопустимое значение',
+    )
+
+
+def get_column_checks(source):
+    """{колонка CSV: (attname, [(функция проверки, сообщение)])}.
+
+    Поля с null=True пропускаются: None сломал бы операторы сравнения.
+    """
+    checks = {}
+    for column, field in source.fields.items():
+        if field.null or field.is_relation:
+            continue
+        field_checks = [
+            check for check in map(make_check, field.validators) if check
+        ]
+        if field.choices:
+            field_checks.append(make_choices_check(field))
+        if field_checks:
+            checks[column] = (field.attname, field_checks)
+    return checks
+
+
+def find_invalid(column, check):
+    """Индексы значений колонки, не прошедших проверку."""
+    return compress(range(len(column)), map(operator.not_, check(column)))
+
+
+def validate_block(source, rows):
+    """Проверяет пачку разобранных строк, дописывая причины отказа.
+
+    rows — список (значения, смещение, номер строки, ошибка); возвращает
+    список того же вида.
+    """
+    parsed = [index for index, row in enumerate(rows) if row[0] is not None]
+    if not parsed:
+        return rows
+    values = [rows[index][0] for index in parsed]
+    errors = {}
+    for column, (attname, checks) in source.column_checks.items():
+        data = list(map(operator.itemgetter(attname), values))
+        for check, message in checks:
+            for index in find_invalid(data, check):
+                errors.setdefault(parsed[index], []).append(
+                    f'{column}: {message}'
+                )
+    for index, messages in errors.items():
+        _, offset, line, _ = rows[index]
+        rows[index] = (None, offset, line, '; '.join(messages))
+    return rows
+
+
+def validate_rows(source, rows, block_size=1000):
+    """Прогоняет поток разобранных строк через validate_block()."""
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= block_size:
+            yield from validate_block(source, block)
+            block = []
+    yield from validate_block(source, block)
+
+
+def find_missing_keys(values, foreign_keys):
+    """Индексы строк со ссылками на несуществующие объекты.
+
+    foreign_keys — {attname: IdSet}; возвращает {индекс: [attname]}.
+    """
+    missing = {}
+    for attname, ids in foreign_keys.items():
+        column = list(map(operator.itemgetter(attname), values))
+        present = map(
+            operator.or_,
+            map(operator.is_, column, repeat(None)),
+            map(ids.__contains__, column),
+        )
+        for index in compress(range(len(column)),
+                              map(operator.not_, present)):
+            missing.setdefault(index, []).append(attname)
+    return missing
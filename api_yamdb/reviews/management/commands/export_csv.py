@@ -0,0 +1,98 @@
+import csv
+import time
+from itertools import count
+from operator import itemgetter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+
+from reviews.csv_data import CSV_SOURCES, GZIP_SUFFIX, open_for_write
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def format_datetime(value):
+    """Дата в том же виде, что и в static/data: 2020-01-13T23:20:02.422Z."""
+    if value is None:
+        return None
+    return value.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def get_row_formatter(source):
+    """Функция приведения строки values_list() к виду CSV или None.
+
+    Преобразуются только колонки с датами, остальные значения csv.writer
+    пишет сам (None — пустой строкой).
+    """
+    positions = [
+        index for index, field in enumerate(source.fields.values())
+        if isinstance(field, models.DateTimeField)
+    ]
+    if not positions:
+        return None
+
+    def format_row(row):
+        row = list(row)
+        for index in positions:
+            row[index] = format_datetime(row[index])
+        return row
+
+    return format_row
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает базу в CSV-файлы того же формата, что и static/data, '
+        'чтобы их можно было загрузить обратно командой import_csv.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Каталог для CSV-файлов.')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать файлы (имена вида review.csv.gz).'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Сколько строк читать из БД за один запрос.'
+        )
+        parser.add_argument(
+            '--files', nargs='+', metavar='FILE',
+            choices=[source.filename for source in CSV_SOURCES],
+            help='Выгрузить только перечисленные файлы.'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше нуля')
+        path.mkdir(parents=True, exist_ok=True)
+        for source in CSV_SOURCES:
+            if options['files'] and source.filename not in options['files']:
+                continue
+            filename = path / source.filename
+            if options['gzip']:
+                filename = filename.with_name(filename.name + GZIP_SUFFIX)
+            self.export_file(source, filename, options['chunk_size'])
+
+    def export_file(self, source, filename, chunk_size):
+        started = time.perf_counter()
+        rows = source.model.objects.order_by('pk').values_list(
+            *source.columns.values()
+        ).iterator(chunk_size=chunk_size)
+        # zip со счётчиком считает строки, не добавляя цикла на Python.
+        counter = count()
+        format_row = get_row_formatter(source)
+        if format_row:
+            rows = map(format_row, rows)
+        with open_for_write(filename) as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(source.columns)
+            writer.writerows(map(itemgetter(0), zip(rows, counter)))
+        exported = next(counter)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'>>> {filename}: выгружено {exported} строк за '
+            f'{elapsed:.2f} с ({exported / max(elapsed, 1e-6):.0f} строк/с)'
+        ))
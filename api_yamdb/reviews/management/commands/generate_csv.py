@@ -0,0 +1,276 @@
+import csv
+import random
+import time
+from datetime import date, timedelta
+from itertools import chain, count, repeat
+from operator import add, itemgetter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reviews.csv_data import GZIP_SUFFIX, SOURCES_BY_FILENAME, open_for_write
+
+BATCH_SIZE = 10000
+FIRST_USER_ID = 100
+FIRST_YEAR = 1900
+PUB_DATE_DAYS = 365 * 10
+TEXT_POOL_SIZE = 20000
+
+WORDS = (
+    'фильм книга песня история герой время жизнь мир город дорога ночь '
+    'утро море небо память любовь война друг враг дом окно свет тень '
+    'голос сердце путь звезда река лес поле ветер огонь вода земля '
+    'тайна сон правда ложь музыка сюжет финал актёр режиссёр автор '
+    'глава роман поэма альбом сцена кадр роль образ смысл чувство '
+    'долгий тихий яркий тёмный новый старый странный честный смешной '
+    'грустный быстрый медленный холодный тёплый последний первый '
+    'красивый скучный живой настоящий сильный слабый светлый '
+    'смотреть читать слушать любить ждать помнить верить искать '
+    'понимать видеть знать думать жить играть петь писать '
+    'очень совсем почти снова вдруг всегда никогда сегодня вчера '
+    'здесь там просто действительно наконец'
+).split()
+CATEGORIES = (
+    ('Фильм', 'movie'), ('Книга', 'book'), ('Музыка', 'music'),
+    ('Сериал', 'series'), ('Спектакль', 'play'), ('Игра', 'game'),
+)
+GENRES = (
+    ('Драма', 'drama'), ('Комедия', 'comedy'), ('Вестерн', 'western'),
+    ('Фэнтези', 'fantasy'), ('Фантастика', 'sci-fi'),
+    ('Детектив', 'detective'), ('Триллер', 'thriller'),
+    ('Сказка', 'tale'), ('Гонзо', 'gonzo'), ('Роман', 'roman'),
+    ('Баллада', 'ballad'), ('Рок-н-ролл', 'rock-n-roll'),
+    ('Классика', 'classical'), ('Рок', 'rock'), ('Шансон', 'chanson'),
+)
+# Оценки сдвинуты к высоким, как в реальных отзывах.
+SCORE_WEIGHTS = (1, 1, 2, 2, 4, 6, 9, 12, 11, 8)
+
+
+def make_names(pairs, total):
+    """Первые названия берутся из списка, остальные нумеруются."""
+    for index in range(total):
+        name, slug = pairs[index % len(pairs)]
+        lap = index // len(pairs)
+        if lap:
+            name, slug = f'{name} {lap + 1}', f'{slug}-{lap + 1}'
+        yield index + 1, name, slug
+
+
+def make_text(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    words[0] = words[0].capitalize()
+    return ' '.join(words) + rng.choice('.!.?.')
+
+
+def author_ids(first, size, users):
+    """size подряд идущих id пользователей начиная с first, по кругу."""
+    end = first + size
+    ids = range(FIRST_USER_ID + first, FIRST_USER_ID + min(end, users))
+    if end <= users:
+        return ids
+    return chain(ids, range(FIRST_USER_ID, FIRST_USER_ID + end - users))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетический набор данных в формате static/data '
+        'для нагрузочного тестирования: число отзывов на произведение '
+        'распределено по степенному закону.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Каталог для CSV-файлов.')
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=200000)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--categories', type=int, default=3)
+        parser.add_argument('--genres', type=int, default=15)
+        parser.add_argument(
+            '--skew', type=float, default=1.2,
+            help='Показатель степенного закона: чем меньше, тем сильнее '
+                 'отзывы сосредоточены на популярных произведениях.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать файлы (имена вида review.csv.gz).'
+        )
+
+    def handle(self, *args, **options):
+        for name in ('titles', 'users', 'categories', 'genres'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должен быть больше нуля')
+        if options['reviews'] < 0 or options['comments'] < 0:
+            raise CommandError('Число отзывов и комментариев неотрицательно')
+        if options['skew'] <= 0:
+            raise CommandError('--skew должен быть больше нуля')
+        self.options = options
+        self.path = Path(options['path'])
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.rng = random.Random(options['seed'])
+        self.days = [
+            (date.today() - timedelta(days=offset)).isoformat() + 'T'
+            for offset in range(PUB_DATE_DAYS)
+        ]
+        self.times = [
+            f'{hour:02}:{minute:02}:{second:02}'
+            for hour in range(24) for minute in range(60)
+            for second in range(60)
+        ]
+        self.millis = [f'.{milli:03}Z' for milli in range(1000)]
+
+        self.write(
+            'category.csv', make_names(CATEGORIES, options['categories'])
+        )
+        self.write('genre.csv', make_names(GENRES, options['genres']))
+        self.write('titles.csv', self.generate_titles())
+        self.write('users.csv', self.generate_users())
+        self.write('genre_title.csv', self.generate_genre_titles())
+        self.reviews = 0
+        self.write('review.csv', self.generate_reviews())
+        self.write('comments.csv', self.generate_comments())
+
+    def write(self, filename, rows):
+        started = time.perf_counter()
+        target = self.path / filename
+        if self.options['gzip']:
+            target = target.with_name(target.name + GZIP_SUFFIX)
+        counter = count()
+        with open_for_write(target) as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(SOURCES_BY_FILENAME[filename].columns)
+            writer.writerows(map(itemgetter(0), zip(rows, counter)))
+        written = next(counter)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'>>> {target}: {written} строк за {elapsed:.2f} с '
+            f'({written / max(elapsed, 1e-6):.0f} строк/с)'
+        ))
+
+    def random_dates(self, total):
+        """total дат публикации за последние PUB_DATE_DAYS дней."""
+        # Строки склеиваются из готовых кусков через map(add), без
+        # форматирования каждой даты на Python.
+        rng = self.rng
+        return map(
+            add,
+            map(
+                add,
+                rng.choices(self.days, k=total),
+                rng.choices(self.times, k=total),
+            ),
+            rng.choices(self.millis, k=total),
+        )
+
+    def generate_titles(self):
+        rng = self.rng
+        now = timezone.now().year
+        # Новых произведений больше, чем старых.
+        years = range(FIRST_YEAR, now + 1)
+        year_weights = [index + 10 for index in range(len(years))]
+        categories = range(1, self.options['categories'] + 1)
+        for start in range(1, self.options['titles'] + 1, BATCH_SIZE):
+            ids = range(start, min(start + BATCH_SIZE,
+                                   self.options['titles'] + 1))
+            names = [make_text(rng, 1, 4).rstrip('.!?') for _ in ids]
+            yield from zip(
+                ids, names,
+                rng.choices(years, weights=year_weights, k=len(ids)),
+                rng.choices(categories, k=len(ids)),
+            )
+
+    def generate_users(self):
+        for index in range(self.options['users']):
+            username = f'user{index}'
+            role = settings.USER
+            if index % 1000 == 1:
+                role = settings.MODERATOR
+            elif index % 1000 == 2:
+                role = settings.ADMIN
+            yield (
+                FIRST_USER_ID + index, username, f'{username}@yamdb.fake',
+                role, '', '', '',
+            )
+
+    def generate_genre_titles(self):
+        rng = self.rng
+        genres = range(1, self.options['genres'] + 1)
+        ids = count(1)
+        for title_id in range(1, self.options['titles'] + 1):
+            total = min(rng.choice((1, 1, 2, 2, 3)), len(genres))
+            for genre_id in sorted(rng.sample(genres, total)):
+                yield next(ids), title_id, genre_id
+
+    def get_review_counts(self):
+        """Число отзывов на каждое произведение.
+
+        Веса по распределению Парето масштабируются так, чтобы в сумме
+        получилось около --reviews. У одного произведения не может быть
+        больше отзывов, чем пользователей: (title, author) уникальны.
+        """
+        rng = self.rng
+        alpha = self.options['skew']
+        weights = [
+            rng.paretovariate(alpha) for _ in range(self.options['titles'])
+        ]
+        scale = self.options['reviews'] / sum(weights)
+        users = self.options['users']
+        return [
+            min(int(weight * scale + rng.random()), users)
+            for weight in weights
+        ]
+
+    def generate_reviews(self):
+        rng = self.rng
+        users = self.options['users']
+        counts = self.get_review_counts()
+        texts = [make_text(rng, 5, 40) for _ in range(
+            min(TEXT_POOL_SIZE, max(sum(counts), 1))
+        )]
+        ids = count(1)
+        for start in range(0, len(counts), BATCH_SIZE):
+            batch = counts[start:start + BATCH_SIZE]
+            total = sum(batch)
+            if not total:
+                continue
+            title_ids = chain.from_iterable(
+                map(repeat, range(start + 1, start + len(batch) + 1), batch)
+            )
+            # Авторы отзывов на произведение — подряд идущие пользователи
+            # со случайного места, поэтому пара (title, author) уникальна.
+            authors = chain.from_iterable(map(
+                author_ids, rng.choices(range(users), k=len(batch)),
+                batch, repeat(users)
+            ))
+            rows = zip(
+                ids, title_ids,
+                rng.choices(texts, k=total),
+                authors,
+                rng.choices(range(1, 11), weights=SCORE_WEIGHTS, k=total),
+                self.random_dates(total),
+            )
+            self.reviews += total
+            yield from rows
+
+    def generate_comments(self):
+        rng = self.rng
+        if not self.reviews:
+            return
+        texts = [make_text(rng, 3, 30) for _ in range(
+            min(TEXT_POOL_SIZE, self.options['comments'])
+        )]
+        authors = range(FIRST_USER_ID, FIRST_USER_ID + self.options['users'])
+        reviews = range(1, self.reviews + 1)
+        total = self.options['comments']
+        for start in range(1, total + 1, BATCH_SIZE):
+            ids = range(start, min(start + BATCH_SIZE, total + 1))
+            yield from zip(
+                ids,
+                rng.choices(reviews, k=len(ids)),
+                rng.choices(texts, k=len(ids)),
+                rng.choices(authors, k=len(ids)),
+                self.random_dates(len(ids)),
+            )
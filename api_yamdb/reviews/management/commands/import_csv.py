@@ -0,0 +1,488 @@
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import chain, groupby
+from operator import itemgetter
+from pathlib import Path
+
+import django
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from reviews.changelog import LOGGED_MODELS, log_changes, touch
+from reviews.csv_data import (CSV_SOURCES, DATA_DIR, SOURCES_BY_FILENAME,
+                              IdSet, find_data_file, read_csv, read_header,
+                              split_csv)
+from reviews.csv_validation import find_missing_keys, validate_rows
+from reviews.models import ChangeLogEntry, ImportCheckpoint, Review, Title
+from reviews.search import rebuild_title_search
+from reviews.versions import bump_all
+
+from .recalculate_ratings import recalculate_ratings
+
+DEFAULT_BATCH_SIZE = 1000
+ID_CHUNK_SIZE = 10000
+# Размер куска файла, который разбирает один процесс при --workers > 1.
+PARSE_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+@contextmanager
+def keep_auto_now(sources):
+    """Не даёт auto_now/auto_now_add затереть даты из CSV."""
+    fields = [
+        field for source in sources for field in source.fields.values()
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def describe_error(error):
+    if isinstance(error, ValidationError):
+        return '; '.join(error.messages)
+    return f'нет колонки {error}'
+
+
+def parse_rows(source, rows):
+    """Приводит строки CSV к значениям полей модели.
+
+    Отдаёт (значения, смещение, номер строки, ошибка); для строки,
+    которую не удалось разобрать, значения равны None.
+    """
+    for row, offset, line in rows:
+        try:
+            values, error = source.to_python(row), None
+        except (KeyError, ValidationError) as exc:
+            values, error = None, describe_error(exc)
+        yield values, offset, line, error
+
+
+def parse_and_validate(source, rows):
+    return validate_rows(source, parse_rows(source, rows))
+
+
+def parse_chunk(filename, source_filename, start, end, line):
+    """Разбирает и проверяет кусок файла в процессе-обработчике."""
+    source = SOURCES_BY_FILENAME[source_filename]
+    return list(parse_and_validate(
+        source, read_csv(filename, offset=start, line=line, end=end)
+    ))
+
+
+def run_ordered(executor, tasks, window):
+    """Выполняет задачи в пуле, отдавая результаты в порядке задач.
+
+    Одновременно в работе не больше window задач, так что память
+    ограничена, даже если запись в БД отстаёт от разбора.
+    """
+    pending = deque()
+    for key, *args in tasks:
+        pending.append((key, executor.submit(parse_chunk, *args)))
+        if len(pending) >= window:
+            key, future = pending.popleft()
+            yield key, future.result()
+    while pending:
+        key, future = pending.popleft()
+        yield key, future.result()
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов static/data в базу.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=str(DATA_DIR),
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Сколько строк вставлять одним запросом.'
+        )
+        parser.add_argument(
+            '--files', nargs='+', metavar='FILE',
+            choices=[source.filename for source in CSV_SOURCES],
+            help='Загрузить только перечисленные файлы.'
+        )
+        parser.add_argument(
+            '--stream', action='store_true',
+            help=(
+                'Вставлять строки через executemany без создания моделей: '
+                'память ограничена одной пачкой, подходит для больших дампов.'
+            )
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help=(
+                'Обновлять строки с уже существующими id вместо ошибки. '
+                'Неизменившиеся строки не перезаписываются.'
+            )
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help=(
+                'Фиксировать каждую пачку отдельно и запоминать позицию в '
+                'файле, чтобы после сбоя продолжить с места остановки.'
+            )
+        )
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help=(
+                'Сколько процессов разбирают CSV; 0 (по умолчанию) — по '
+                'числу ядер, 1 — без дочерних процессов. Запись в БД всё '
+                'равно идёт из одного процесса.'
+            )
+        )
+        parser.add_argument(
+            '--rejected', metavar='FILE',
+            help=(
+                'Записать отклонённые строки (файл, строка, причина) в CSV '
+                'вместо вывода в stderr.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_dir():
+            raise CommandError(f'Каталог {path} не найден')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        if options['workers'] < 0:
+            raise CommandError('--workers не может быть отрицательным')
+        workers = options['workers'] or os.cpu_count() or 1
+        self.batch_size = options['batch_size']
+        self.stream = options['stream']
+        self.upsert = options['upsert']
+        self.resume = options['resume']
+        self.known_ids = {}
+        if self.stream:
+            # Тексты отзывов в дампах бывают длиннее лимита по умолчанию.
+            csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+        sources = [
+            source for source in CSV_SOURCES
+            if not options['files'] or source.filename in options['files']
+        ]
+        models = [source.model for source in sources]
+        jobs = self.get_jobs(path, sources)
+        with keep_auto_now(sources), self.open_report(options['rejected']):
+            if workers > 1:
+                self.import_parallel(jobs, workers)
+            else:
+                self.import_sequential(jobs)
+        finished = [str(filename.resolve()) for _, filename, _ in jobs]
+
+        self.reset_sequences(models)
+        if Review in models:
+            recalculate_ratings()
+        if Title in models:
+            rebuild_title_search()
+        # Строки вставлены без сигналов, кэши API надо сбросить.
+        bump_all()
+        if self.resume:
+            # Загрузка завершена, следующий запуск начнёт файлы с начала.
+            ImportCheckpoint.objects.filter(filename__in=finished).delete()
+
+    def get_known_ids(self, model):
+        """Множество pk, которые уже есть в БД или загружены из CSV."""
+        if model not in self.known_ids:
+            self.known_ids[model] = IdSet(
+                model.objects.values_list('pk', flat=True).iterator(
+                    chunk_size=ID_CHUNK_SIZE
+                )
+            )
+        return self.known_ids[model]
+
+    def get_checkpoint(self, filename):
+        stat = filename.stat()
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(
+            filename=str(filename.resolve()),
+            defaults={'file_size': stat.st_size, 'file_mtime': stat.st_mtime}
+        )
+        if created:
+            return checkpoint
+        if (checkpoint.file_size, checkpoint.file_mtime) != (
+            stat.st_size, stat.st_mtime
+        ):
+            self.stderr.write(
+                f'>>> Файл {filename} изменился после прошлой загрузки, '
+                f'загрузка начнётся с начала'
+            )
+            checkpoint.offset = checkpoint.line = checkpoint.rows = 0
+            checkpoint.file_size = stat.st_size
+            checkpoint.file_mtime = stat.st_mtime
+            checkpoint.save()
+        elif checkpoint.offset:
+            self.stdout.write(
+                f'>>> {filename}: продолжение со строки {checkpoint.line + 1}'
+            )
+        return checkpoint
+
+    @contextmanager
+    def open_report(self, filename):
+        if filename is None:
+            self.report = None
+            yield
+            return
+        with open(filename, 'w', encoding='utf-8', newline='') as file:
+            self.report = csv.writer(file)
+            self.report.writerow(('file', 'line', 'reason'))
+            yield
+
+    def reject(self, filename, line, reason):
+        if self.report is None:
+            self.stderr.write(f'{filename}:{line}: {reason}, строка пропущена')
+        else:
+            self.report.writerow((filename.name, line, reason))
+
+    def check_header(self, source, filename):
+        missing = set(source.columns) - set(read_header(filename))
+        if missing:
+            raise CommandError(
+                f'{filename}: нет колонок {", ".join(sorted(missing))}'
+            )
+
+    def get_jobs(self, path, sources):
+        """Список (источник, путь к файлу, контрольная точка) для загрузки."""
+        jobs = []
+        for source in sources:
+            filename = find_data_file(path, source.filename)
+            if filename is None:
+                self.stderr.write(
+                    f'>>> Файл {path / source.filename} не найден'
+                )
+                continue
+            self.check_header(source, filename)
+            checkpoint = self.get_checkpoint(filename) if self.resume else None
+            jobs.append((source, filename, checkpoint))
+        return jobs
+
+    def import_sequential(self, jobs):
+        for source, filename, checkpoint in jobs:
+            rows = read_csv(
+                filename,
+                offset=checkpoint.offset if checkpoint else 0,
+                line=checkpoint.line if checkpoint else 0,
+            )
+            self.import_file(
+                source, filename, parse_and_validate(source, rows), checkpoint
+            )
+
+    def import_parallel(self, jobs, workers):
+        """Разбирает файлы кусками в пуле процессов.
+
+        Куски всех файлов ставятся в очередь сразу, поэтому разбор следующих
+        по графу зависимостей файлов идёт, пока пишутся предыдущие. Пишет в
+        БД только этот процесс и строго в порядке CSV_SOURCES, так что
+        внешние ключи проверяются по уже загруженным таблицам.
+        """
+        tasks = (
+            (index, str(filename), source.filename, *chunk)
+            for index, (source, filename, checkpoint) in enumerate(jobs)
+            for chunk in split_csv(
+                filename, PARSE_CHUNK_SIZE,
+                offset=checkpoint.offset if checkpoint else 0,
+                line=checkpoint.line if checkpoint else 0,
+            )
+        )
+        executor = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+        with executor:
+            results = run_ordered(executor, tasks, window=2 * workers)
+            # split_csv отдаёт хотя бы один кусок на файл, так что группы
+            # результатов идут ровно в порядке jobs.
+            groups = groupby(results, key=itemgetter(0))
+            for (source, filename, checkpoint), (_, chunks) in zip(
+                jobs, groups
+            ):
+                rows = chain.from_iterable(chunk for _, chunk in chunks)
+                self.import_file(source, filename, rows, checkpoint)
+
+    def import_file(self, source, filename, rows, checkpoint=None):
+        started = time.perf_counter()
+        # Без --resume файл загружается целиком одной транзакцией,
+        # с --resume транзакцией становится каждая пачка.
+        atomic = nullcontext() if self.resume else transaction.atomic()
+        try:
+            with atomic:
+                created, updated, skipped = self.write_rows(
+                    source, filename, rows, checkpoint
+                )
+        except IntegrityError as error:
+            raise CommandError(f'{filename}: {error}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'>>> Данные {source} загрузились успешно: добавлено {created}, '
+            f'обновлено {updated} за {elapsed:.2f} с '
+            f'({(created + updated) / max(elapsed, 1e-6):.0f} строк/с), '
+            f'пропущено {skipped}'
+        ))
+
+    def write_rows(self, source, filename, rows, checkpoint=None):
+        created = updated = skipped = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                stats = self.write_batch(source, filename, batch, checkpoint)
+                created += stats[0]
+                updated += stats[1]
+                skipped += stats[2]
+        stats = self.write_batch(source, filename, batch, checkpoint)
+        return created + stats[0], updated + stats[1], skipped + stats[2]
+
+    def write_batch(self, source, filename, batch, checkpoint):
+        """Записывает пачку и, при --resume, позицию в файле после неё."""
+        position = batch[-1][1:3] if batch else None
+        accepted = self.accept_rows(source, filename, batch)
+        atomic = transaction.atomic() if checkpoint else nullcontext()
+        with atomic:
+            created, updated = self.flush(source, accepted)
+            if checkpoint is not None and position is not None:
+                checkpoint.offset, checkpoint.line = position
+                checkpoint.rows += created + updated
+                checkpoint.save()
+        skipped = len(batch) - len(accepted)
+        batch.clear()
+        return created, updated, skipped
+
+    def accept_rows(self, source, filename, batch):
+        """Значения строк пачки, прошедших проверки и внешние ключи."""
+        valid = [row for row in batch if row[3] is None]
+        values = [row[0] for row in valid]
+        missing = find_missing_keys(values, {
+            attname: self.get_known_ids(model)
+            for attname, model in source.foreign_keys.items()
+        })
+        if len(valid) == len(batch) and not missing:
+            return values
+        rejected = {
+            line: error for _, _, line, error in batch if error is not None
+        }
+        for index, attnames in missing.items():
+            rejected[valid[index][2]] = (
+                f'нет связанных объектов для {", ".join(attnames)}'
+            )
+        for line in sorted(rejected):
+            self.reject(filename, line, rejected[line])
+        return [
+            row for index, row in enumerate(values) if index not in missing
+        ]
+
+    def flush(self, source, batch):
+        if not batch:
+            return 0, 0
+        own_ids = self.get_known_ids(source.model)
+        pk_name = source.model._meta.pk.attname
+        if not self.upsert:
+            self.insert(source, batch)
+            self.log(source, batch, ChangeLogEntry.CREATE)
+            own_ids.update(values[pk_name] for values in batch)
+            return len(batch), 0
+
+        new, existing = [], []
+        for values in batch:
+            if values[pk_name] in own_ids:
+                existing.append(values)
+            else:
+                new.append(values)
+        changed = self.get_changed(source, existing) if existing else []
+        if new:
+            self.insert(source, new)
+            self.log(source, new, ChangeLogEntry.CREATE)
+            own_ids.update(values[pk_name] for values in new)
+        if changed:
+            self.update(source, changed)
+            self.log(source, changed, ChangeLogEntry.UPDATE)
+        return len(new), len(changed)
+
+    def log(self, source, batch, action):
+        """Журнал изменений: строки пишутся мимо сигналов."""
+        if source.model is Title.genre.through:
+            # Связь с жанром — изменение произведения.
+            touch(Title, list(dict.fromkeys(
+                values['title_id'] for values in batch
+            )))
+        elif source.model in LOGGED_MODELS:
+            pk_name = source.model._meta.pk.attname
+            log_changes(
+                source.model, [values[pk_name] for values in batch], action
+            )
+
+    def get_changed(self, source, existing):
+        """Оставляет из существующих строк только изменившиеся."""
+        pk_name = source.model._meta.pk.attname
+        attnames = source.data_attnames
+        stored = {
+            row[0]: row[1:]
+            for row in source.model.objects.filter(
+                pk__in=[values[pk_name] for values in existing]
+            ).values_list(pk_name, *attnames)
+        }
+        return [
+            values for values in existing
+            if stored.get(values[pk_name]) != tuple(
+                values[attname] for attname in attnames
+            )
+        ]
+
+    def insert(self, source, batch):
+        if self.stream:
+            defaults = source.get_db_defaults(connection)
+            with connection.cursor() as cursor:
+                cursor.executemany(source.get_insert_sql(connection), [
+                    source.to_db_row(values, defaults, connection)
+                    for values in batch
+                ])
+        else:
+            source.model.objects.bulk_create(
+                [source.model(**values) for values in batch],
+                batch_size=self.batch_size
+            )
+
+    def update(self, source, batch):
+        if self.stream:
+            with connection.cursor() as cursor:
+                cursor.executemany(source.get_update_sql(connection), [
+                    source.to_db_update_row(values, connection)
+                    for values in batch
+                ])
+        else:
+            # bulk_update() не заполняет auto_now, время ставится явно.
+            extra = {field.attname: timezone.now()
+                     for field in source.auto_now_fields}
+            fields = [field.attname for field in source.update_fields]
+            if source.is_versioned:
+                extra['version'] = F('version') + 1
+                fields.append('version')
+            source.model.objects.bulk_update(
+                [source.model(**values, **extra) for values in batch],
+                fields,
+                batch_size=self.batch_size
+            )
+
+    def reset_sequences(self, models):
+        """Сдвигает счётчики pk после вставки строк с явными id."""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import TitleSearch
+from reviews.search import rebuild_title_search
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс названий произведений.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_title_search()
+        self.stdout.write(self.style.SUCCESS(
+            f'В индексе {TitleSearch.objects.count()} произведений'
+        ))
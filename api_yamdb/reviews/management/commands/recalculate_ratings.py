@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import (Count, F, IntegerField, OuterRef, Q,
+                              Subquery, Sum)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from reviews.changelog import BATCH_SIZE, log_changes
+from reviews.models import ChangeLogEntry, Review, Title, get_rating
+from reviews.versions import bump_version, version_key
+
+
+def recalculate_ratings(titles=None):
+    """Пересчитывает рейтинг произведений по таблице отзывов.
+
+    Обновляются и попадают в журнал только произведения, у которых
+    сохранённые сумма и число оценок разошлись с отзывами; возвращает
+    их число.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    rating_sum = Coalesce(
+        Subquery(
+            reviews.annotate(total=Sum('score')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+    rating_count = Coalesce(
+        Subquery(
+            reviews.annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+    stale_ids = list(titles.annotate(
+        new_sum=rating_sum, new_count=rating_count
+    ).filter(
+        ~Q(rating_sum=F('new_sum'))
+        | ~Q(rating_count=F('new_count'))
+        | Q(rating__isnull=True, new_count__gt=0)
+        | Q(rating__isnull=False, new_count=0)
+    ).values_list('pk', flat=True))
+    for start in range(0, len(stale_ids), BATCH_SIZE):
+        batch = stale_ids[start:start + BATCH_SIZE]
+        stale = Title.objects.filter(pk__in=batch)
+        stale.update(rating_sum=rating_sum, rating_count=rating_count)
+        stale.update(
+            rating=get_rating(F('rating_sum'), F('rating_count')),
+            updated_at=timezone.now(),
+            version=F('version') + 1,
+        )
+        log_changes(Title, batch, ChangeLogEntry.UPDATE)
+    if stale_ids:
+        bump_version(version_key(Title))
+    return len(stale_ids)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг всех произведений с нуля.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = recalculate_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг исправлен у {updated} произведений'
+        ))
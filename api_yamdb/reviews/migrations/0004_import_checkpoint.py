@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=500, unique=True, verbose_name='файл')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='смещение, байт')),
+                ('line', models.PositiveBigIntegerField(default=0, verbose_name='строка')),
+                ('rows', models.PositiveBigIntegerField(default=0, verbose_name='загружено строк')),
+                ('file_size', models.PositiveBigIntegerField(verbose_name='размер файла')),
+                ('file_mtime', models.FloatField(verbose_name='время изменения файла')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='обновлено')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка импорта',
+                'verbose_name_plural': 'Контрольные точки импорта',
+            },
+        ),
+    ]
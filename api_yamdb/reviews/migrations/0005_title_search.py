@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 18:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.search
+
+
+def create_search_table(apps, schema_editor):
+    reviews.search.create_search_table(schema_editor)
+    reviews.search.rebuild_title_search(schema_editor.connection)
+
+
+def drop_search_table(apps, schema_editor):
+    reviews.search.drop_search_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_import_checkpoint'),
+    ]
+
+    operations = [
+        # На SQLite таблица виртуальная (FTS5), Django её создать не умеет.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='TitleSearch',
+                    fields=[
+                        ('title', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='reviews.title')),
+                        ('name', reviews.search.FullTextField(verbose_name='название')),
+                        ('rank', models.FloatField(editable=False, null=True)),
+                    ],
+                    options={
+                        'verbose_name': 'Поисковый индекс произведения',
+                        'verbose_name_plural': 'Поисковый индекс произведений',
+                        'db_table': 'reviews_title_search',
+                    },
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_table, drop_search_table),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-18 18:38
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, NullIf
+import reviews.validators
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.update(rating=Cast(
+        F('rating_sum'), models.FloatField()
+    ) / NullIf(F('rating_count'), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_category_year_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(db_index=True, editable=False, null=True, verbose_name='рейтинг'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.IntegerField(db_index=True, validators=[reviews.validators.validate_year], verbose_name='год'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,100 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import (MaxValueValidator, MinValueValidator)
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
 
+from .search import FullTextField
 from .validators import validate_year, validate_username
 
 CHARS_TO_SHOW = 15
 
 
+def get_rating(rating_sum, rating_count):
+    """SQL-выражение средней оценки; без оценок — NULL."""
+    return Cast(rating_sum, models.FloatField()) / NullIf(rating_count, 0)
+
+
+class VersionConflict(Exception):
+    """Объект изменён после того, как клиент прочитал его версию."""
+
+
+class TimestampedModel(models.Model):
+    """Модель со временем последнего изменения для /api/v1/sync/."""
+    updated_at = models.DateTimeField(
+        'изменено',
+        auto_now=True,
+        db_index=True
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        # Сигналы пишут рейтинг и журнал изменений, поэтому запись
+        # объекта и их записи идут одной транзакцией.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class VersionedModel(TimestampedModel):
+    """Модель с номером версии для оптимистичной блокировки.
+
+    Каждое сохранение увеличивает version в том же UPDATE. Если задан
+    expected_version (версия из If-Match), UPDATE выполняется с условием
+    `version = expected_version`, и без совпадения поднимается
+    VersionConflict: ни блокировки строки, ни отдельного чтения.
+    """
+    version = models.PositiveIntegerField(
+        'версия',
+        default=1,
+        editable=False
+    )
+    expected_version = None
+
+    class Meta(TimestampedModel.Meta):
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        expected, previous = self.expected_version, self.version
+        self.version = F('version') + 1
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = previous
+            raise
+        finally:
+            self.expected_version = None
+        if expected is None:
+            self.refresh_from_db(fields=('version',))
+        else:
+            self.version = expected + 1
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        expected = self.expected_version
+        if expected is not None:
+            base_qs = base_qs.filter(version=expected)
+        updated = super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+        if not updated and expected is not None:
+            raise VersionConflict(
+                f'{self._meta.object_name} {pk_val}: версия уже не {expected}'
+            )
+        return updated
+
+
 class User(AbstractUser):
     username = models.CharField(
         validators=(validate_username,),
@@ -83,7 +170,7 @@ class User(AbstractUser):
         return self.role == settings.MODERATOR
 
 
-class Category(models.Model):
+class Category(TimestampedModel):
     name = models.CharField('Категория', max_length=200)
     slug = models.SlugField(max_length=50, unique=True)
 
@@ -95,7 +182,7 @@ class Category(models.Model):
         return self.name
 
 
-class Genre(models.Model):
+class Genre(TimestampedModel):
     name = models.CharField('Жанр', max_length=200)
     slug = models.SlugField(max_length=50, unique=True)
 
@@ -107,7 +194,7 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class Title(VersionedModel):
     name = models.CharField(
         'название',
         max_length=200,
@@ -115,7 +202,8 @@ class Title(models.Model):
     )
     year = models.IntegerField(
         'год',
-        validators=(validate_year, )
+        validators=(validate_year, ),
+        db_index=True
     )
     category = models.ForeignKey(
         Category,
@@ -136,16 +224,62 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='жанр'
     )
+    rating_sum = models.PositiveIntegerField(
+        'сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'количество оценок',
+        default=0,
+        editable=False
+    )
+    # Хранится, чтобы сортировка по рейтингу шла по индексу.
+    rating = models.FloatField(
+        'рейтинг',
+        null=True,
+        editable=False,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(
+                fields=('category', 'year'),
+                name='title_category_year_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class TitleSearch(models.Model):
+    """Строка полнотекстового индекса названий, см. reviews/search.py."""
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_index'
+    )
+    name = FullTextField('название')
+    # Релевантность bm25 от FTS5: чем меньше, тем лучше совпадение.
+    rank = models.FloatField(null=True, editable=False)
+
+    class Meta:
+        db_table = 'reviews_title_search'
+        verbose_name = 'Поисковый индекс произведения'
+        verbose_name_plural = 'Поисковый индекс произведений'
 
     def __str__(self):
         return self.name
 
 
-class Review(models.Model):
+class Review(VersionedModel):
     text = models.TextField("место для текста")
     author = models.ForeignKey(
         User,
@@ -176,6 +310,12 @@ class Review(models.Model):
     class Meta:
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('title', 'author', ),
@@ -186,7 +326,7 @@ class Review(models.Model):
         return f'{self.text[:20]} для {self.title}'
 
 
-class Comment(models.Model):
+class Comment(VersionedModel):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='comments')
     text = models.TextField()
@@ -202,6 +342,94 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "Коммментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.text[:20]} для {self.review}'
+
+
+class Tombstone(models.Model):
+    """Удалённый объект: по этой записи /api/v1/sync/ сообщает об удалении."""
+    model = models.CharField('модель', max_length=100)
+    object_id = models.BigIntegerField('id объекта')
+    deleted_at = models.DateTimeField('удалён', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Удалённый объект'
+        verbose_name_plural = 'Удалённые объекты'
+        indexes = [
+            models.Index(
+                fields=('model', 'deleted_at'),
+                name='tombstone_model_deleted_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+
+class ChangeLogEntry(models.Model):
+    """Запись журнала изменений; id — её номер в последовательности.
+
+    Журнал только дополняется: записи пишутся сигналами в транзакции
+    самого изменения и не меняются после вставки.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = (
+        (CREATE, 'создан'),
+        (UPDATE, 'изменён'),
+        (DELETE, 'удалён'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField('модель', max_length=100)
+    object_id = models.BigIntegerField('id объекта')
+    action = models.CharField('действие', max_length=6, choices=ACTIONS)
+    created_at = models.DateTimeField('время', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Запись журнала изменений'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('model', 'id'),
+                name='changelog_model_id_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.id}: {self.action} {self.model} {self.object_id}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Журнал изменений только дополняется.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Журнал изменений только дополняется.')
+
+
+class ImportCheckpoint(models.Model):
+    """Позиция, до которой CSV-файл уже загружен командой import_csv."""
+    filename = models.CharField('файл', max_length=500, unique=True)
+    offset = models.PositiveBigIntegerField('смещение, байт', default=0)
+    line = models.PositiveBigIntegerField('строка', default=0)
+    rows = models.PositiveBigIntegerField('загружено строк', default=0)
+    file_size = models.PositiveBigIntegerField('размер файла')
+    file_mtime = models.FloatField('время изменения файла')
+    updated_at = models.DateTimeField('обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Контрольная точка импорта'
+        verbose_name_plural = 'Контрольные точки импорта'
+
+    def __str__(self):
+        return f'{self.filename}: {self.offset}'
@@ -0,0 +1,114 @@
+"""Полнотекстовый поиск по названиям произведений.
+
+На SQLite названия лежат в виртуальной таблице FTS5 с токенизатором
+unicode61: регистр сворачивается для любых букв, а не только ASCII, как у
+LIKE. Таблица обновляется сигналами при сохранении и удалении Title, после
+массовой загрузки её пересобирает rebuild_title_search(). На других СУБД
+создаётся обычная таблица, а поиск работает через icontains.
+"""
+import re
+
+from django.db import connection, models
+
+from .versions import bump_version
+
+SEARCH_TABLE = 'reviews_title_search'
+TOKENIZER = 'unicode61 remove_diacritics 2'
+WORD = re.compile(r'\w+')
+
+
+class Match(models.Lookup):
+    """`поле__match`: запрос FTS5 по одной колонке таблицы."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class FullTextField(models.TextField):
+    """Колонка таблицы FTS5."""
+
+
+FullTextField.register_lookup(Match)
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def normalize(text):
+    # unicode61 не считает «ё» вариантом «е».
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def make_match_query(text):
+    """Запрос FTS5 из пользовательской строки или None, если слов нет.
+
+    Каждое слово берётся в кавычки (операторы FTS5 в нём не работают) и
+    ищется по префиксу; слова объединяются через AND.
+    """
+    words = WORD.findall(normalize(text))
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def create_search_table(schema_editor):
+    quote = schema_editor.quote_name
+    if is_supported(schema_editor.connection):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {quote(SEARCH_TABLE)} '
+            f"USING fts5(name, tokenize='{TOKENIZER}')"
+        )
+    else:
+        # Обычная таблица с теми же колонками, чтобы модель работала.
+        schema_editor.execute(
+            f'CREATE TABLE {quote(SEARCH_TABLE)} ('
+            f'{quote("rowid")} bigint PRIMARY KEY, '
+            f'{quote("name")} text NOT NULL, '
+            f'{quote("rank")} double precision NULL)'
+        )
+
+
+def drop_search_table(schema_editor):
+    schema_editor.execute(
+        f'DROP TABLE {schema_editor.quote_name(SEARCH_TABLE)}'
+    )
+
+
+def index_title(title_id, name):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [title_id]
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name) VALUES (%s, %s)',
+            [title_id, normalize(name)]
+        )
+
+
+def unindex_title(title_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [title_id]
+        )
+
+
+def rebuild_title_search(using=connection):
+    """Заполняет индекс заново по таблице произведений."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name) '
+            f"SELECT id, replace(replace(name, 'ё', 'е'), 'Ё', 'Е') "
+            f'FROM reviews_title'
+        )
+    bump_version(SEARCH_TABLE)
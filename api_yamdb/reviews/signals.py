@@ -0,0 +1,174 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete,
+                                      post_migrate, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import versions
+from .changelog import LOGGED_MODELS, log_changes, touch
+from .models import (Category, ChangeLogEntry, Comment, Genre, Review, Title,
+                     Tombstone, User, get_rating)
+from .search import index_title, unindex_title
+
+
+def change_rating(title_id, score_delta, count_delta):
+    rating_sum = F('rating_sum') + score_delta
+    rating_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=get_rating(rating_sum, rating_count),
+        updated_at=timezone.now(),
+        version=F('version') + 1,
+    )
+    log_changes(Title, [title_id], ChangeLogEntry.UPDATE)
+
+
+def touch_titles(title_ids):
+    touch(Title, title_ids)
+
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_delete, sender=Review)
+def read_stored_score(sender, instance, raw=False, **kwargs):
+    """Оценка и произведение отзыва, какими они лежат в БД сейчас.
+
+    Значения загруженного объекта могут устареть: тот же отзыв мог
+    сохранить другой запрос. Чтение идёт в транзакции записи с
+    блокировкой строки, поэтому разница к рейтингу считается от
+    действительно записанной оценки.
+    """
+    instance._stored_score = None
+    if raw or instance.pk is None:
+        return
+    instance._stored_score = Review.objects.select_for_update().filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = instance._stored_score
+    if created or stored is None:
+        change_rating(instance.title_id, instance.score, 1)
+        return
+    old_title_id, old_score = stored
+    if old_title_id != instance.title_id:
+        change_rating(old_title_id, -old_score, -1)
+        change_rating(instance.title_id, instance.score, 1)
+    elif old_score != instance.score:
+        change_rating(instance.title_id, instance.score - old_score, 0)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    if instance._stored_score is not None:
+        old_title_id, old_score = instance._stored_score
+        change_rating(old_title_id, -old_score, -1)
+
+
+@receiver(post_save, sender=Title)
+def update_search_index_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_title(instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Title)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    unindex_title(instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def create_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        model=sender._meta.label_lower, object_id=instance.pk
+    )
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def touch_titles_on_delete(sender, instance, **kwargs):
+    touch_titles(list(instance.titles.values_list('pk', flat=True)))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def touch_titles_on_rename(sender, instance, created, raw=False, **kwargs):
+    # Название и slug выводятся в произведениях.
+    if not created and not raw:
+        touch_titles(list(instance.titles.values_list('pk', flat=True)))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genre_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if action == 'pre_clear' and reverse:
+        # После очистки уже не узнать, какие произведения были связаны.
+        title_ids = list(instance.titles.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        title_ids = [instance.pk]
+    elif action in ('post_add', 'post_remove') and reverse:
+        title_ids = list(pk_set)
+    else:
+        return
+    touch_titles(title_ids)
+
+
+def log_save(sender, instance, created, **kwargs):
+    ChangeLogEntry.objects.create(
+        model=sender._meta.label_lower,
+        object_id=instance.pk,
+        action=ChangeLogEntry.CREATE if created else ChangeLogEntry.UPDATE
+    )
+
+
+def log_delete(sender, instance, **kwargs):
+    ChangeLogEntry.objects.create(
+        model=sender._meta.label_lower,
+        object_id=instance.pk,
+        action=ChangeLogEntry.DELETE
+    )
+
+
+for model in LOGGED_MODELS:
+    post_save.connect(log_save, sender=model)
+    post_delete.connect(log_delete, sender=model)
+
+
+@receiver(pre_save, sender=User)
+def bump_username_version(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    """Версия имён пользователей для ETag списков отзывов и комментариев.
+
+    Общая версия таблицы пользователей меняется при любой записи, в том
+    числе при регистрации, и сбрасывала бы ETag всех списков.
+    """
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    stored = User.objects.filter(pk=instance.pk).values_list(
+        'username', flat=True
+    ).first()
+    if stored is not None and stored != instance.username:
+        versions.bump_version(versions.version_key(User, field='username'))
+        # Имя автора выводится в отзывах и комментариях.
+        for model in (Review, Comment):
+            touch(model, list(model.objects.filter(
+                author_id=instance.pk
+            ).values_list('pk', flat=True)))
+
+
+# Версии таблиц для кэшей API меняются при записи в любую модель.
+post_save.connect(versions.bump_on_write)
+post_delete.connect(versions.bump_on_write)
+m2m_changed.connect(versions.bump_on_m2m_change)
+post_migrate.connect(versions.bump_all)
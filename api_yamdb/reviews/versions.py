@@ -0,0 +1,125 @@
+"""Версии таблиц для инвалидации кэша.
+
+Каждая запись через ORM (post_save, post_delete, m2m_changed) меняет
+версию своей таблицы в кэше Django. Ключ закэшированного значения
+включает версии всех таблиц, из которых оно прочитано, поэтому после
+записи старое значение перестаёт находиться и само истекает по TTL.
+Массовые update() и bulk_create() сигналов не шлют: код, который пишет
+в обход ORM (import_csv, rebuild_title_search), меняет версии сам, иначе
+изменения станут видны после истечения TTL.
+
+Версии живут TABLE_VERSION_TIMEOUT секунд. В кэше процесса (LocMemCache)
+другие воркеры не видят новую версию, поэтому без срока они отдавали бы
+старые ответы и 304 бесконечно; истёкшая версия создаётся заново, и
+кэши, построенные на ней, перестают находиться.
+
+Кроме версии всей таблицы запись меняет версии своей строки
+(`reviews_review:pk=7`) и групп по внешним ключам (`reviews_review:title=3`):
+по ним ETag списка отзывов одного произведения не зависит от отзывов
+к другим.
+
+Запись меняет версии дважды: сразу и после фиксации транзакции. Иначе
+запрос, прочитавший строки до фиксации, закэшировал бы их под новой
+версией, и старые данные отдавались бы до истечения TTL.
+
+Версия — время создания в миллисекундах и случайный хвост, а не счётчик:
+если кэш вытеснит ключ версии, новая версия не совпадёт ни с одной из
+прежних. Время даёт заголовок Last-Modified.
+"""
+import re
+import time
+import uuid
+from functools import lru_cache, partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'table_version:'
+# Общая версия всех таблиц, меняется после migrate и flush.
+EPOCH_KEY = KEY_PREFIX + '*'
+QUOTED_NAME = re.compile(r'[`"](\w+)[`"]')
+
+
+def new_version():
+    return f'{time.time_ns() // 1_000_000:x}.{uuid.uuid4().hex[:8]}'
+
+
+def get_modified(versions):
+    """Время последней записи (Unix, целые секунды) по списку версий."""
+    return max(int(version.split('.')[0], 16) for version in versions) // 1000
+
+
+def version_key(model, **scope):
+    """Имя версии таблицы модели или её части: version_key(Review, title=3)."""
+    key = model._meta.db_table
+    for name, value in scope.items():
+        key += f':{name}={value}'
+    return key
+
+
+@lru_cache(maxsize=None)
+def get_table_names():
+    return frozenset(
+        model._meta.db_table
+        for model in apps.get_models(include_auto_created=True)
+    )
+
+
+def get_query_tables(sql):
+    """Таблицы моделей, которые упоминаются в SQL, включая подзапросы."""
+    return sorted(set(QUOTED_NAME.findall(sql)) & get_table_names())
+
+
+def get_versions(keys):
+    """Версии ключей и общая версия (первой) списком."""
+    keys = [EPOCH_KEY] + [KEY_PREFIX + key for key in keys]
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=settings.TABLE_VERSION_TIMEOUT)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def get_version(keys):
+    """Одна строка из версий: меняется при записи в любую из таблиц."""
+    return '-'.join(get_versions(keys))
+
+
+def set_versions(keys):
+    version = new_version()
+    cache.set_many(
+        {KEY_PREFIX + key: version for key in keys},
+        timeout=settings.TABLE_VERSION_TIMEOUT
+    )
+
+
+def bump_version(*keys):
+    """Меняет версии сейчас и ещё раз после фиксации текущей транзакции."""
+    set_versions(keys)
+    transaction.on_commit(partial(set_versions, keys))
+
+
+def bump_on_write(sender, instance, **kwargs):
+    """Обработчик post_save и post_delete."""
+    keys = [version_key(sender), version_key(sender, pk=instance.pk)]
+    for field in sender._meta.concrete_fields:
+        value = getattr(instance, field.attname)
+        if field.many_to_one and value is not None:
+            keys.append(version_key(sender, **{field.name: value}))
+    bump_version(*keys)
+
+
+def bump_on_m2m_change(sender, action, **kwargs):
+    # sender — промежуточная модель связи.
+    if action.startswith('post_'):
+        bump_version(sender._meta.db_table)
+
+
+def bump_all(**kwargs):
+    """Обработчик post_migrate: после migrate и flush данные другие."""
+    cache.set(
+        EPOCH_KEY, new_version(), timeout=settings.TABLE_VERSION_TIMEOUT
+    )
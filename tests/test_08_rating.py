@@ -0,0 +1,130 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAPI:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client, moderator,
+                                       moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения равен средней оценке.'
+        )
+
+        response = user_client.patch(
+            f'{url}{reviews[1]["id"]}/', data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг пересчитывается при изменении оценки.'
+        )
+
+        response = admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва.'
+        )
+
+        user.delete()
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что рейтинг пересчитывается при каскадном '
+            'удалении отзывов.'
+        )
+
+        moderator.delete()
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Если отзывов о произведении нет - значением поля `rating` '
+            'должено быть `None`.'
+        )
+
+    def test_02_recalculate_ratings_command(self, admin_client, admin,
+                                            user, user_client):
+        from reviews.models import Title
+
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        assert self.get_rating(admin_client, title_id) is None
+
+        call_command('recalculate_ratings')
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что команда `recalculate_ratings` восстанавливает '
+            'рейтинг произведений по отзывам.'
+        )
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.rating_sum, title.rating_count) == (0, 0)
+
+    def test_03_stale_instances_keep_rating_consistent(self, admin_client,
+                                                       admin, user,
+                                                       user_client):
+        from django.db.models import Count, Sum
+
+        from reviews.models import Review, Title
+
+        def expected(title):
+            totals = Review.objects.filter(title=title).aggregate(
+                total=Sum('score'), count=Count('pk')
+            )
+            return totals['total'] or 0, totals['count']
+
+        author_map = {admin: admin_client, user: user_client}
+        reviews, _ = create_reviews(admin_client, author_map)
+        review_id = reviews[0]['id']
+        first = Review.objects.get(pk=review_id)
+        second = Review.objects.get(pk=review_id)
+        first.score = 7
+        first.save()
+        second.score = 9
+        second.save()
+        title = Title.objects.get(pk=first.title_id)
+        assert (title.rating_sum, title.rating_count) == expected(title), (
+            'Проверьте, что разница к рейтингу считается от оценки, '
+            'записанной в БД, а не загруженной в объект.'
+        )
+        first.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == expected(title)
+
+    def test_04_recalculate_only_stale_titles(self, admin_client, admin,
+                                              user, user_client):
+        from reviews.models import ChangeLogEntry, Title
+
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        before = dict(Title.objects.values_list('pk', 'updated_at'))
+        last_id = ChangeLogEntry.objects.order_by('id').last().id
+
+        call_command('recalculate_ratings')
+        assert not ChangeLogEntry.objects.filter(id__gt=last_id).exists(), (
+            'Проверьте, что `recalculate_ratings` не пишет в журнал '
+            'произведения с верным рейтингом.'
+        )
+        assert dict(Title.objects.values_list('pk', 'updated_at')) == before
+
+        title_id = titles[0]['id']
+        Title.objects.filter(pk=title_id).update(rating_count=0)
+        call_command('recalculate_ratings')
+        assert list(ChangeLogEntry.objects.filter(
+            model='reviews.title', id__gt=last_id
+        ).values_list('object_id', flat=True)) == [title_id]
+        assert self.get_rating(admin_client, title_id) == 5
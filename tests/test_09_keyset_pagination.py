@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_titles
+
+
+def collect_pages(client, url):
+    results = []
+    pages = 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `cursor` '
+            'возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что keyset-пагинация не считает количество объектов.'
+        )
+        results.extend(data['results'])
+        url = data['next']
+        pages += 1
+    return results, pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09KeysetPagination:
+
+    def test_01_titles_cursor(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/?cursor=&limit=1'
+        results, pages = collect_pages(client, url)
+        assert pages == 2
+        assert [title['id'] for title in results] == sorted(
+            title['id'] for title in titles
+        )
+
+        response = client.get(url)
+        next_page = client.get(response.json()['next']).json()
+        previous_page = client.get(next_page['previous']).json()
+        assert previous_page['results'] == response.json()['results'], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу.'
+        )
+        assert previous_page['previous'] is None
+
+    def test_02_reviews_and_comments_cursor(self, admin_client, admin,
+                                            user_client, user,
+                                            moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        results, pages = collect_pages(admin_client, f'{url}?cursor=&limit=2')
+        assert pages == 2
+        assert [review['id'] for review in results] == [
+            review['id'] for review in reversed(reviews)
+        ], 'Отзывы должны отдаваться от новых к старым.'
+
+        url = f'{url}{reviews[0]["id"]}/comments/'
+        results, _ = collect_pages(admin_client, f'{url}?cursor=&limit=1')
+        assert [comment['id'] for comment in results] == [
+            comment['id'] for comment in reversed(comments)
+        ]
+
+    def test_03_invalid_cursor(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = admin_client.get('/api/v1/titles/')
+        assert 'count' in response.json(), (
+            'Без параметра `cursor` должна использоваться обычная пагинация.'
+        )
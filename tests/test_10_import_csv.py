@@ -0,0 +1,259 @@
+import csv
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.csv_data import (CSV_SOURCES, DATA_DIR, IdSet, read_csv,
+                              split_csv)
+from reviews.models import (Category, Comment, ImportCheckpoint, Review,
+                            Title, User)
+
+
+def count_rows(filename):
+    with open(DATA_DIR / filename, encoding='utf-8', newline='') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ImportCsv:
+
+    def test_01_import_all_files(self):
+        call_command('import_csv', batch_size=7)
+        for source in CSV_SOURCES:
+            assert (
+                source.model.objects.count() == count_rows(source.filename)
+            ), (
+                f'Проверьте, что команда `import_csv` загружает все строки '
+                f'файла {source.filename}.'
+            )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что дата публикации берётся из CSV.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        assert title.rating_count == title.reviews.count(), (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг.'
+        )
+        assert title.genre.exists(), (
+            'Проверьте, что загружается файл genre_title.csv.'
+        )
+
+    def test_02_missing_foreign_keys_are_skipped(self, tmp_path):
+        (tmp_path / 'comments.csv').write_text(
+            'id,review_id,text,author,pub_date\n'
+            '1,999,text,100,2020-01-13T23:20:02.422Z\n',
+            encoding='utf-8'
+        )
+        call_command('import_csv', path=str(tmp_path), files=['comments.csv'])
+        assert not Comment.objects.exists()
+
+    def test_03_duplicate_import_fails(self):
+        call_command('import_csv', files=['category.csv'])
+        with pytest.raises(CommandError):
+            call_command('import_csv', files=['category.csv'])
+
+    def test_04_stream_import(self):
+        call_command('import_csv', batch_size=5, stream=True)
+        for source in CSV_SOURCES:
+            assert (
+                source.model.objects.count() == count_rows(source.filename)
+            ), (
+                f'Проверьте, что `import_csv --stream` загружает все строки '
+                f'файла {source.filename}.'
+            )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019
+        assert review.title.rating_count == review.title.reviews.count()
+
+    def test_05_resume_after_failure(self, tmp_path):
+        (tmp_path / 'category.csv').write_text(
+            'id,name,slug\n1,Фильм,movie\n2,Книга,book\n3,Музыка,music\n',
+            encoding='utf-8'
+        )
+        Category.objects.create(id=10, name='Музыка', slug='music')
+        with pytest.raises(CommandError):
+            call_command(
+                'import_csv', path=str(tmp_path), files=['category.csv'],
+                batch_size=1, resume=True
+            )
+        assert set(Category.objects.values_list('id', flat=True)) == {
+            1, 2, 10
+        }, 'Проверьте, что с --resume каждая пачка фиксируется отдельно.'
+        assert ImportCheckpoint.objects.get().line == 3
+
+        Category.objects.filter(id=10).delete()
+        call_command(
+            'import_csv', path=str(tmp_path), files=['category.csv'],
+            batch_size=1, resume=True
+        )
+        assert set(Category.objects.values_list('id', flat=True)) == {
+            1, 2, 3
+        }, 'Проверьте, что повторный запуск продолжает загрузку.'
+        assert not ImportCheckpoint.objects.exists()
+
+    @pytest.mark.parametrize('stream', (False, True))
+    def test_06_upsert(self, tmp_path, stream):
+        call_command('import_csv', files=['category.csv'])
+        (tmp_path / 'category.csv').write_text(
+            'id,name,slug\n1,Кино,movie\n2,Книга,book\n7,Игры,games\n',
+            encoding='utf-8'
+        )
+        call_command(
+            'import_csv', path=str(tmp_path), files=['category.csv'],
+            upsert=True, stream=stream
+        )
+        assert Category.objects.get(pk=1).name == 'Кино', (
+            'Проверьте, что `import_csv --upsert` обновляет изменённые строки.'
+        )
+        assert Category.objects.filter(pk=7).exists()
+
+    @pytest.mark.parametrize('stream', (False, True))
+    def test_07_upsert_bumps_version(self, tmp_path, stream):
+        from reviews.models import Title
+
+        call_command('import_csv', files=['category.csv', 'titles.csv'])
+        version = Title.objects.get(pk=1).version
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n1,Новое название,1994,1\n',
+            encoding='utf-8'
+        )
+        call_command(
+            'import_csv', path=str(tmp_path), files=['titles.csv'],
+            upsert=True, stream=stream
+        )
+        assert Title.objects.get(pk=1).version == version + 1, (
+            'Проверьте, что перезапись строки импортом увеличивает version.'
+        )
+
+    @pytest.mark.parametrize('options', ({'workers': 2}, {}))
+    def test_08_parallel_import(self, monkeypatch, options):
+        from reviews.management.commands import import_csv
+
+        monkeypatch.setattr(import_csv, 'PARSE_CHUNK_SIZE', 2048)
+        # Без --workers разбор идёт по числу ядер.
+        monkeypatch.setattr(import_csv.os, 'cpu_count', lambda: 2)
+
+        def import_sequential(self, jobs):
+            raise AssertionError('Ожидался параллельный разбор.')
+
+        monkeypatch.setattr(
+            import_csv.Command, 'import_sequential', import_sequential
+        )
+        call_command('import_csv', batch_size=10, **options)
+        for source in CSV_SOURCES:
+            assert (
+                source.model.objects.count() == count_rows(source.filename)
+            ), (
+                f'Проверьте, что `import_csv --workers` загружает все строки '
+                f'файла {source.filename}.'
+            )
+
+    def test_09_rejected_rows_report(self, tmp_path):
+        call_command('import_csv', files=['category.csv'])
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n'
+            '1,Годный,1994,1\n'
+            '2,Из будущего,3000,1\n'
+            '3,Без категории,1990,99\n'
+            '4,Без года,,1\n',
+            encoding='utf-8'
+        )
+        (tmp_path / 'users.csv').write_text(
+            'id,username,email,role,bio,first_name,last_name\n'
+            '500,me,me@yamdb.fake,user,,,\n'
+            '501,bad name,bad@yamdb.fake,boss,,,\n'
+            '502,good,good@yamdb.fake,user,,,\n',
+            encoding='utf-8'
+        )
+        report = tmp_path / 'rejected.csv'
+        call_command(
+            'import_csv', path=str(tmp_path), rejected=str(report),
+            files=['titles.csv', 'users.csv']
+        )
+        assert list(Title.objects.values_list('id', flat=True)) == [1]
+        assert list(User.objects.values_list('id', flat=True)) == [502]
+
+        with open(report, encoding='utf-8', newline='') as file:
+            rejected = {
+                (row['file'], int(row['line'])): row['reason']
+                for row in csv.DictReader(file)
+            }
+        assert set(rejected) == {
+            ('titles.csv', 3), ('titles.csv', 4), ('titles.csv', 5),
+            ('users.csv', 2), ('users.csv', 3),
+        }, 'Проверьте, что все отклонённые строки попадают в отчёт.'
+        assert 'year' in rejected[('titles.csv', 3)]
+        assert 'category_id' in rejected[('titles.csv', 4)]
+        assert 'role' in rejected[('users.csv', 3)]
+
+    def test_10_export_round_trip(self, tmp_path):
+        call_command('import_csv')
+        call_command('export_csv', str(tmp_path), gzip=True, chunk_size=10)
+        assert (tmp_path / 'review.csv.gz').exists(), (
+            'Проверьте, что с --gzip команда `export_csv` сжимает файлы.'
+        )
+        expected = {
+            source.filename: list(
+                source.model.objects.order_by('pk').values_list(
+                    *source.columns.values()
+                )
+            )
+            for source in CSV_SOURCES
+        }
+        for source in reversed(CSV_SOURCES):
+            source.model.objects.all().delete()
+        call_command('import_csv', path=str(tmp_path))
+        for source in CSV_SOURCES:
+            assert list(
+                source.model.objects.order_by('pk').values_list(
+                    *source.columns.values()
+                )
+            ) == expected[source.filename], (
+                f'Проверьте, что файл {source.filename} после выгрузки '
+                f'загружается обратно без изменений.'
+            )
+
+    def test_11_generated_dataset(self, tmp_path):
+        call_command(
+            'generate_csv', str(tmp_path), titles=50, reviews=500, users=20,
+            comments=100, categories=8, genres=20, seed=1
+        )
+        call_command('import_csv', path=str(tmp_path), batch_size=100)
+        assert Title.objects.count() == 50
+        assert User.objects.count() == 20
+        assert Category.objects.filter(slug='movie-2').exists(), (
+            'Проверьте, что при нехватке готовых названий категорий '
+            'генерируются новые с уникальным slug.'
+        )
+        with open(tmp_path / 'review.csv', encoding='utf-8') as file:
+            reviews = sum(1 for _ in csv.DictReader(file))
+        assert Review.objects.count() == reviews > 0, (
+            'Проверьте, что пары (произведение, автор) в отзывах уникальны.'
+        )
+        assert Comment.objects.count() == 100
+        title = Title.objects.order_by('-rating_count').first()
+        assert title.rating_count == title.reviews.count() > reviews / 50, (
+            'Проверьте, что отзывы распределены неравномерно.'
+        )
+
+
+def test_split_csv_keeps_multiline_records():
+    filename = DATA_DIR / 'review.csv'
+    expected = list(read_csv(filename))
+    chunks = list(split_csv(filename, 1024))
+    assert len(chunks) > 1
+    rows = [
+        row
+        for start, end, line in chunks
+        for row in read_csv(filename, offset=start, line=line, end=end)
+    ]
+    assert rows == expected
+
+
+def test_id_set():
+    ids = IdSet([0, 7, 8, 100000])
+    ids.add(8)
+    assert len(ids) == 4
+    assert 100000 in ids and 8 in ids and 0 in ids
+    assert 9 not in ids and -1 not in ids and 10 ** 9 not in ids
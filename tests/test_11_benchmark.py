@@ -0,0 +1,54 @@
+import pytest
+
+from api.benchmark import Route, get_percentiles, run_route
+from reviews.models import Category
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Benchmark:
+
+    def test_01_run_route(self, settings):
+        # Без кэшей запросы к базе выполняются при каждом вызове.
+        settings.COUNT_CACHE_TIMEOUT = 0
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        Category.objects.bulk_create(
+            Category(name=f'Категория {index}', slug=f'category-{index}')
+            for index in range(3)
+        )
+        result = run_route(
+            Route('categories', '/api/v1/categories/'), iterations=5, warmup=1
+        )
+        assert result['iterations'] == 5
+        assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+        assert result['queries'] == 2, (
+            'Проверьте, что считаются SQL-запросы маршрута.'
+        )
+        assert result['rows_read'] == 4, (
+            'Проверьте, что считаются строки, которые вернули SELECT.'
+        )
+        assert result['rows_written'] == 0
+
+    def test_02_unexpected_status(self):
+        with pytest.raises(AssertionError):
+            run_route(Route('users', '/api/v1/users/'), iterations=1)
+
+
+    def test_03_url_per_iteration(self, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        categories = Category.objects.bulk_create(
+            Category(name=f'Категория {index}', slug=f'category-{index}')
+            for index in range(3)
+        )
+        route = Route(
+            'categories',
+            lambda index: f'/api/v1/categories/?search={categories[index].slug}'
+        )
+        result = run_route(route, iterations=2)
+        assert result['url'] == '/api/v1/categories/?search=category-0'
+
+
+def test_percentiles():
+    samples = list(range(1, 101))
+    assert get_percentiles(samples) == {'p50': 50.5, 'p95': 95.05,
+                                        'p99': 99.01}
+    assert get_percentiles([3.0]) == {'p50': 3.0, 'p95': 3.0, 'p99': 3.0}
@@ -0,0 +1,56 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+
+from api.instrumentation import RequestTimings, fingerprint
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Instrumentation:
+
+    def test_01_server_timing_header(self, admin_client, client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        header = response.get('Server-Timing', '')
+        metrics = {
+            item.split(';')[0].strip(): item for item in header.split(',')
+        }
+        assert set(metrics) == {
+            'total', 'db', 'view', 'serialize', 'render'
+        }, 'Проверьте, что ответ содержит заголовок `Server-Timing`.'
+        assert 'queries' in metrics['db']
+
+    def test_02_log_line(self, admin_client, client, caplog, monkeypatch):
+        create_titles(admin_client)
+        monkeypatch.setattr(
+            logging.getLogger('api.requests'), 'propagate', True
+        )
+        with caplog.at_level(logging.INFO, logger='api.requests'):
+            client.get('/api/v1/titles/')
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['path'] == '/api/v1/titles/'
+        assert record['status'] == HTTPStatus.OK
+        assert record['queries'] > 0
+        assert record['serialize_ms'] > 0, (
+            'Проверьте, что замеряется время сериализации.'
+        )
+        assert record['view_ms'] >= record['serialize_ms']
+
+
+def test_duplicates():
+    timings = RequestTimings()
+    execute = lambda sql, params, many, context: None  # noqa: E731
+    for params in ((1,), (2,), (3,)):
+        timings(execute, 'SELECT * FROM genre WHERE id = %s', params, False,
+                {})
+    timings(execute, 'SELECT * FROM title', (), False, {})
+    assert timings.queries == 4
+    assert timings.get_duplicates() == [{
+        'fingerprint': fingerprint('SELECT * FROM genre WHERE id = %s'),
+        'count': 3,
+        'sql': 'SELECT * FROM genre WHERE id = %s',
+    }]
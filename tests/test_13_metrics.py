@@ -0,0 +1,71 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from api.metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Metrics:
+
+    def test_01_scrape_endpoint(self, client):
+        client.get('/api/v1/categories/')
+        response = client.get('/metrics')
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert (
+            'api_requests_total{view="CategoryViewSet.list",method="GET",'
+            'status="200"}'
+        ) in body, 'Проверьте, что запросы считаются по действиям вьюсетов.'
+        assert (
+            'api_request_duration_seconds_bucket{'
+            'view="CategoryViewSet.list",le="+Inf"}'
+        ) in body
+        assert 'api_request_db_queries_count{view="CategoryViewSet.list"}' \
+            in body
+        assert '# TYPE api_requests_in_flight gauge' in body
+
+
+def make_registry(directory=None):
+    registry = Registry(directory)
+    counter = registry.register(Counter, 'hits', 'Hits.', ('view',))
+    gauge = registry.register(Gauge, 'busy', 'Busy.')
+    histogram = registry.register(
+        Histogram, 'latency', 'Latency.', buckets=(0.1, 1)
+    )
+    return registry, counter, gauge, histogram
+
+
+def test_histogram_render():
+    registry, counter, gauge, histogram = make_registry()
+    counter.inc(('a',))
+    counter.inc(('a',), 2)
+    gauge.inc()
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+    lines = registry.render().splitlines()
+    assert 'hits{view="a"} 3' in lines
+    assert 'busy 1' in lines
+    assert 'latency_bucket{le="0.1"} 1' in lines
+    assert 'latency_bucket{le="1"} 2' in lines
+    assert 'latency_bucket{le="+Inf"} 3' in lines
+    assert 'latency_sum 5.55' in lines
+    assert 'latency_count 3' in lines
+
+
+def test_other_processes_are_merged(tmp_path):
+    registry, counter, gauge, histogram = make_registry(str(tmp_path))
+    counter.inc(('a',))
+    histogram.observe(0.5)
+    # Файл завершившегося воркера: счётчики складываются, gauge нет.
+    (tmp_path / 'metrics_999999999.json').write_text(json.dumps({
+        'hits': [[['a'], 4], [['b'], 1]],
+        'busy': [[[], 7]],
+        'latency': [[[], [1, 0, 0, 0.01]]],
+    }))
+    collected = registry.collect()
+    assert collected['hits'] == {('a',): 5, ('b',): 1}
+    assert collected['busy'] == {}
+    assert collected['latency'] == {(): [1, 1, 0, 0.51]}
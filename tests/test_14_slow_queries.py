@@ -0,0 +1,91 @@
+import json
+import logging
+
+import pytest
+from rest_framework import serializers
+
+from api.slow_queries import find_serializer_field
+from reviews.models import Category, User
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def slow_queries(settings, caplog, monkeypatch):
+    settings.SLOW_QUERY_MS = 0
+    logger = logging.getLogger('api.slow_queries')
+    monkeypatch.setattr(logger, 'handlers', [])
+    monkeypatch.setattr(logger, 'propagate', True)
+    caplog.set_level(logging.WARNING, logger='api.slow_queries')
+
+    def entries():
+        return [
+            json.loads(record.getMessage()) for record in caplog.records
+            if record.name == 'api.slow_queries'
+        ]
+    return entries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14SlowQueries:
+
+    def test_01_plan_and_view(self, admin_client, client, slow_queries):
+        create_titles(admin_client)
+        client.get('/api/v1/titles/', {'name': 'Терм'})
+        entries = [
+            entry for entry in slow_queries()
+            if entry['view'] == 'TitleViewSet.list'
+            and 'LIKE' in entry['sql']
+        ]
+        assert entries, (
+            'Проверьте, что медленные запросы попадают в журнал вместе '
+            'с вьюхой.'
+        )
+        entry = entries[0]
+        assert entry['path'] == '/api/v1/titles/'
+        assert '%Терм%' in entry['params']
+        assert any('SCAN' in line for line in entry['plan']), (
+            'Проверьте, что к запросу приложен план EXPLAIN QUERY PLAN.'
+        )
+
+    def test_02_threshold(self, settings, admin_client, slow_queries):
+        settings.SLOW_QUERY_MS = None
+        create_titles(admin_client)
+        assert not slow_queries()
+
+    def test_03_user_params_and_bulk_inserts(self, slow_queries):
+        User.objects.create_user(
+            username='secret', email='secret@yamdb.fake', password='pass'
+        )
+        Category.objects.bulk_create(
+            Category(name='К' * 500, slug=f'category-{index}')
+            for index in range(100)
+        )
+        entries = slow_queries()
+        user_entries = [
+            entry for entry in entries if 'reviews_user' in entry['sql']
+        ]
+        assert user_entries
+        for entry in user_entries:
+            assert set(entry['params']) <= {'<скрыто>'}, (
+                'Параметры запросов к пользователям не должны попадать '
+                'в журнал.'
+            )
+        insert = next(
+            entry for entry in entries
+            if entry['sql'].startswith('INSERT INTO "reviews_category"')
+        )
+        assert insert['params_total'] >= 200
+        assert len(insert['params']) <= 20
+        assert len(insert['sql']) < 2100
+        assert 'plan' not in insert
+
+
+def test_find_serializer_field():
+    class Serializer(serializers.Serializer):
+        value = serializers.SerializerMethodField()
+
+        def get_value(self, obj):
+            return find_serializer_field()
+
+    assert Serializer({}).data['value'] == ('Serializer', 'value')
+    assert find_serializer_field() == (None, None)
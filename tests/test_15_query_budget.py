@@ -0,0 +1,88 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.mixins import ListModelMixin
+from rest_framework.test import APIClient
+
+from api.urls import router
+from reviews.models import Category, Comment, Genre, Review
+from tests.utils import create_slugged, create_title, create_users
+
+PAGE_SIZES = (2, 20)
+
+
+@pytest.fixture
+def catalog():
+    """Данные, на которых N+1 заметен: у каждого объекта свои связи."""
+    users = create_users(25, prefix='budget')
+    categories = create_slugged(
+        Category, [f'category-{index}' for index in range(25)]
+    )
+    genres = create_slugged(Genre, [f'genre-{index}' for index in range(25)])
+    titles = [
+        create_title(f'Произведение {index}', category=category,
+                     genres=genres[index:index + 2])
+        for index, category in enumerate(categories)
+    ]
+    title = titles[0]
+    reviews = [
+        Review.objects.create(title=title, author=user, text='text', score=5)
+        for user in users
+    ]
+    for user in users:
+        Comment.objects.create(review=reviews[0], author=user, text='text')
+    return {'title_id': title.id, 'review_id': reviews[0].id}
+
+
+def get_list_urls(kwargs):
+    for prefix, viewset, basename in router.registry:
+        if not issubclass(viewset, ListModelMixin):
+            continue
+        url = '/api/' + re.sub(
+            r'\(\?P<(\w+)>[^)]+\)',
+            lambda match: str(kwargs[match.group(1)]),
+            prefix
+        ) + '/'
+        yield viewset, url
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15QueryBudget:
+
+    @pytest.mark.parametrize('cursor', (False, True))
+    def test_01_list_endpoints_fit_budget(self, catalog, admin, cursor,
+                                          settings):
+        # Бюджет считается с COUNT(*), без кэша.
+        settings.COUNT_CACHE_TIMEOUT = 0
+        client = APIClient()
+        # Аутентификация без запроса к базе: считаются только запросы вьюх.
+        client.force_authenticate(admin)
+        for viewset, url in get_list_urls(catalog):
+            budget = getattr(viewset, 'list_query_budget', None)
+            assert budget is not None, (
+                f'Укажите list_query_budget у {viewset.__name__}.'
+            )
+            if cursor and not getattr(viewset, 'keyset_pagination_class',
+                                      None):
+                continue
+            counts = []
+            for limit in PAGE_SIZES:
+                params = {'limit': limit}
+                if cursor:
+                    params['cursor'] = ''
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url, params)
+                assert response.status_code == 200, url
+                assert len(response.json()['results']) == limit, url
+                counts.append(len(queries))
+                assert len(queries) <= budget, (
+                    f'{viewset.__name__}.list сделал {len(queries)} '
+                    f'запросов при бюджете {budget}:\n'
+                    + '\n'.join(query['sql'] for query in queries)
+                )
+            assert len(set(counts)) == 1, (
+                f'Число запросов {viewset.__name__}.list зависит от размера '
+                f'страницы: {counts}.'
+            )
@@ -0,0 +1,78 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import TitleSearch
+from tests.utils import (TITLES_URL, create_title, get_cursor_pages,
+                         get_title_names)
+
+
+@pytest.fixture
+def titles():
+    names = (
+        'Ёлка',
+        'Зелёная миля',
+        'Зеленый фургон',
+        'Миля за милей',
+        'МИЛЯ',
+        'Побег из Шоушенка',
+    )
+    return {name: create_title(name) for name in names}
+
+
+def search(client, text):
+    return get_title_names(client, {'search': text})
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16TitleSearch:
+
+    def test_01_case_insensitive_unicode(self, client, titles):
+        assert set(search(client, 'миля')) == {
+            'Зелёная миля', 'Миля за милей', 'МИЛЯ'
+        }, 'Поиск должен сворачивать регистр кириллицы.'
+
+    def test_02_prefix_and_yo(self, client, titles):
+        assert set(search(client, 'зелен')) == {
+            'Зелёная миля', 'Зеленый фургон'
+        }, 'Проверьте поиск по префиксу и то, что «ё» совпадает с «е».'
+        assert search(client, 'елк') == ['Ёлка']
+        assert search(client, 'зел миля') == ['Зелёная миля']
+
+    def test_03_relevance_order(self, client, titles):
+        assert search(client, 'миля')[0] == 'МИЛЯ', (
+            'Точные совпадения должны идти первыми.'
+        )
+
+    def test_04_cursor_keeps_relevance(self, client, titles):
+        for params in ({'search': 'миля'},
+                       {'search': 'миля', 'ordering': '-name'}):
+            expected = get_title_names(client, params)
+            forward, backward = get_cursor_pages(
+                client, TITLES_URL, {**params, 'limit': 1}
+            )
+            assert [title['name'] for title in forward] == expected, (
+                'Проверьте, что пагинация курсором сохраняет порядок '
+                'поиска и `ordering`.'
+            )
+            assert [title['name'] for title in backward] == expected
+
+    def test_05_index_follows_changes(self, client, titles):
+        title = titles['Побег из Шоушенка']
+        title.name = 'Побег из Алькатраса'
+        title.save()
+        assert search(client, 'шоушенк') == []
+        assert search(client, 'алькатрас') == ['Побег из Алькатраса']
+        title.delete()
+        assert search(client, 'побег') == []
+
+    def test_06_query_syntax_is_escaped(self, client, titles):
+        assert search(client, '"миля" OR NEAR(*') == []
+        assert len(search(client, '  ')) == len(titles)
+
+    def test_07_rebuild_command(self, client, titles):
+        TitleSearch.objects.all().delete()
+        assert search(client, 'миля') == []
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert len(search(client, 'миля')) == 3
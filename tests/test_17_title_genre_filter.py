@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Genre
+from tests.utils import TITLES_URL, create_slugged, create_title, get_titles
+
+
+@pytest.fixture
+def catalog():
+    drama, comedy, horror = create_slugged(
+        Genre, ('drama', 'comedy', 'horror')
+    )
+    films, books = create_slugged(Category, ('films', 'books'))
+    genres = {
+        'Драмеди': (drama, comedy),
+        'Драма': (drama,),
+        'Комедия': (comedy,),
+        'Ужасы': (horror,),
+    }
+    for index, (name, title_genres) in enumerate(genres.items()):
+        create_title(name, category=(films, books)[index % 2],
+                     genres=title_genres)
+
+
+def get_names(client, params):
+    data = get_titles(client, params)
+    names = [title['name'] for title in data['results']]
+    assert data['count'] == len(names), (
+        'Произведение с несколькими подходящими жанрами не должно '
+        'повторяться в выдаче и в count.'
+    )
+    return sorted(names)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleGenreFilter:
+
+    def test_01_genre_any(self, client, catalog):
+        assert get_names(client, {'genre': 'drama,comedy'}) == [
+            'Драма', 'Драмеди', 'Комедия'
+        ]
+        assert get_names(client, {'genre': 'drama'}) == ['Драма', 'Драмеди']
+
+    def test_02_genre_all(self, client, catalog):
+        params = {'genre': 'drama,comedy', 'genre_match': 'all'}
+        assert get_names(client, params) == ['Драмеди']
+        params['genre'] = 'drama,horror'
+        assert get_names(client, params) == []
+
+    def test_03_exact_slug(self, client, catalog):
+        assert get_names(client, {'genre': 'dram'}) == [], (
+            'Фильтр по жанру должен сравнивать slug целиком.'
+        )
+        assert get_names(client, {'category': 'film'}) == []
+
+    def test_04_category_list(self, client, catalog):
+        assert get_names(client, {'category': 'films'}) == [
+            'Драмеди', 'Комедия'
+        ]
+        assert len(get_names(client, {'category': 'films,books'})) == 4
+
+    def test_05_invalid_match_mode(self, client, catalog):
+        response = client.get(
+            TITLES_URL, {'genre': 'drama', 'genre_match': 'some'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_06_service_fields_are_not_filters(self, client, catalog):
+        params = {'rating_sum': 10, 'version': 2, 'description': 'нет'}
+        assert len(get_names(client, params)) == 4, (
+            'Служебные поля произведения не должны быть фильтрами.'
+        )
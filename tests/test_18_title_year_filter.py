@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+
+from api.filter import TitleFilter
+from reviews.models import Category, Title
+from tests.utils import create_slugged, create_title, get_titles
+
+
+@pytest.fixture
+def catalog():
+    films, books = create_slugged(Category, ('films', 'books'))
+    for year in (1989, 1990, 1995, 1999, 2000, 2010):
+        create_title(f'Фильм {year}', year=year, category=films)
+    create_title('Книга 1995', year=1995, category=books)
+
+
+def get_years(client, params):
+    return sorted(
+        title['year'] for title in get_titles(client, params)['results']
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18TitleYearFilter:
+
+    def test_01_exact_year(self, client, catalog):
+        assert get_years(client, {'year': 1995}) == [1995, 1995]
+        assert get_years(client, {'year': 199}) == [], (
+            'Фильтр year должен сравнивать год целиком, а не как строку.'
+        )
+
+    def test_02_year_range(self, client, catalog):
+        assert get_years(client, {'year_min': 1995, 'year_max': 2000}) == [
+            1995, 1995, 1999, 2000
+        ]
+        assert get_years(client, {'year_min': 2000}) == [2000, 2010]
+
+    def test_03_decade(self, client, catalog):
+        params = {'decade': 1990, 'category': 'films'}
+        assert get_years(client, params) == [1990, 1995, 1999]
+        params['decade'] = 1997
+        assert get_years(client, params) == [1990, 1995, 1999]
+
+    def test_04_range_uses_index(self, catalog):
+        queryset = TitleFilter(
+            {'category': 'films', 'decade': 1990},
+            queryset=Title.objects.all()
+        ).qs
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        assert 'title_category_year_idx (category_id=? AND year>? AND ' \
+            'year<?)' in plan, plan
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+from tests.utils import (TITLES_URL, create_title, create_users,
+                         get_cursor_pages, get_title_names)
+
+
+@pytest.fixture
+def catalog():
+    critics = create_users(2, prefix='critic')
+    scores = {
+        ('Б', 1999): (10, 9),
+        ('А', 1999): (9,),
+        ('В', 2005): (9,),
+        ('Г', 1980): (),
+    }
+    for (name, year), title_scores in scores.items():
+        create_title(name, year=year, scores=title_scores, authors=critics)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TitleOrdering:
+
+    def test_01_rating(self, client, catalog):
+        assert get_title_names(client, {'ordering': '-rating'}) == [
+            'Б', 'В', 'А', 'Г'
+        ], (
+            'Проверьте сортировку по убыванию рейтинга: при равном рейтинге '
+            'порядок задаёт id, произведения без оценок идут последними.'
+        )
+        params = {'ordering': '-rating', 'limit': 2}
+        assert get_title_names(client, params) == ['Б', 'В']
+
+    def test_02_several_fields(self, client, catalog):
+        assert get_title_names(client, {'ordering': 'year,name'}) == [
+            'Г', 'А', 'Б', 'В'
+        ]
+        params = {'ordering': '-rating,year,name'}
+        assert get_title_names(client, params) == ['Б', 'А', 'В', 'Г']
+
+    def test_03_rating_follows_reviews(self, client, catalog):
+        Review.objects.filter(title__name='Б').delete()
+        names = get_title_names(client, {'ordering': '-rating'})
+        assert names[-2:] == ['Г', 'Б']
+
+    def test_04_top_rated_uses_index(self, client, catalog):
+        with CaptureQueriesContext(connection) as queries:
+            get_title_names(client, {'ordering': '-rating', 'limit': 10})
+        page_sql = next(
+            query['sql'] for query in queries
+            if 'ORDER BY' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + page_sql)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        assert 'USING INDEX' in plan and 'TEMP B-TREE' not in plan, plan
+
+    @pytest.mark.parametrize('ordering', (
+        '-rating', 'rating', '-rating,year,name', 'year,-name'
+    ))
+    def test_05_cursor_keeps_ordering(self, client, catalog, ordering):
+        expected = get_title_names(client, {'ordering': ordering})
+        forward, backward = get_cursor_pages(
+            client, TITLES_URL, {'ordering': ordering, 'limit': 1}
+        )
+        assert [title['name'] for title in forward] == expected, (
+            'Проверьте, что пагинация курсором сохраняет сортировку '
+            '`ordering`, включая произведения без рейтинга.'
+        )
+        assert [title['name'] for title in backward] == expected
+
+    def test_06_cursor_from_other_ordering(self, client, catalog):
+        response = client.get(
+            TITLES_URL, {'ordering': '-rating', 'cursor': '', 'limit': 1}
+        )
+        next_url = response.json()['next']
+        cursor = next_url.split('cursor=')[1].split('&')[0]
+        response = client.get(
+            TITLES_URL, {'ordering': 'year', 'cursor': cursor}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
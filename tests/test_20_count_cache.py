@@ -0,0 +1,66 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre, Title
+from tests.utils import TITLES_URL, create_title
+
+
+@pytest.fixture
+def titles():
+    return [create_title(f'Произведение {index}') for index in range(3)]
+
+
+def get_page(client, params=None):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(TITLES_URL, params or {})
+    assert response.status_code == HTTPStatus.OK
+    counts = [query for query in queries if 'COUNT(' in query['sql']]
+    return response.json(), len(counts)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20CountCache:
+
+    def test_01_count_is_cached(self, client, titles):
+        data, counted = get_page(client)
+        assert (data['count'], data['count_exact'], counted) == (3, True, 1)
+        data, counted = get_page(client, {'offset': 1})
+        assert data['count'] == 3
+        assert counted == 0, 'Повторный COUNT(*) должен браться из кэша.'
+
+    def test_02_write_invalidates(self, client, titles):
+        get_page(client)
+        Title.objects.create(name='Новое', year=2001)
+        assert get_page(client)[0]['count'] == 4
+        titles[0].delete()
+        assert get_page(client)[0]['count'] == 3
+
+    def test_03_m2m_change_invalidates(self, client, titles):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        assert get_page(client, {'genre': 'drama'})[0]['count'] == 0
+        titles[0].genre.add(genre)
+        assert get_page(client, {'genre': 'drama'})[0]['count'] == 1
+
+    def test_04_count_disabled(self, client, titles):
+        data, counted = get_page(client, {'count': 'false', 'limit': 2})
+        assert counted == 0
+        assert data['count'] is None
+        assert len(data['results']) == 2
+        assert 'offset=2' in data['next']
+        data, _ = get_page(client, {'count': 'false', 'limit': 2,
+                                    'offset': 2})
+        assert len(data['results']) == 1
+        assert data['next'] is None
+
+    def test_05_count_limit(self, client, titles, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        settings.COUNT_LIMIT = 2
+        data, _ = get_page(client, {'limit': 1})
+        assert (data['count'], data['count_exact']) == (2, False)
+        assert data['next'] is not None
+        settings.COUNT_LIMIT = 5
+        data, _ = get_page(client, {'limit': 1})
+        assert (data['count'], data['count_exact']) == (3, True)
@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Review, Title
+from reviews.versions import get_version, version_key
+
+TITLES_URL = '/api/v1/titles/'
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), len(queries)
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильмы', slug='films')
+    return Title.objects.create(name='Фильм', year=2000, category=category)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ResponseCache:
+
+    def test_01_repeated_list_is_cached(self, client, title):
+        first, _ = get(client, TITLES_URL)
+        second, queries = get(client, TITLES_URL)
+        assert second == first
+        assert queries == 0, 'Повторный запрос списка должен браться из кэша.'
+        _, queries = get(client, TITLES_URL + '?limit=1')
+        assert queries > 0, 'Ключ кэша должен учитывать параметры запроса.'
+
+    def test_02_category_write_invalidates(self, client, admin_client):
+        assert get(client, '/api/v1/categories/')[0]['count'] == 0
+        response = admin_client.post(
+            '/api/v1/categories/', {'name': 'Книги', 'slug': 'books'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert get(client, '/api/v1/categories/')[0]['count'] == 1
+
+    def test_03_related_writes_invalidate_titles(self, client, title, user):
+        get(client, TITLES_URL)
+        Review.objects.create(title=title, author=user, text='t', score=7)
+        data, _ = get(client, TITLES_URL)
+        assert data['results'][0]['rating'] == 7, (
+            'Новый отзыв должен сбрасывать кэш списка произведений.'
+        )
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title.genre.add(genre)
+        data, _ = get(client, TITLES_URL)
+        assert data['results'][0]['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ]
+        title.category.name = 'Кино'
+        title.category.save()
+        data, _ = get(client, TITLES_URL)
+        assert data['results'][0]['category']['name'] == 'Кино'
+
+    def test_04_version_changes_again_on_commit(self):
+        keys = [version_key(Category)]
+        with transaction.atomic():
+            Category.objects.create(name='Книги', slug='books')
+            # Ответ, собранный другим запросом до фиксации, попал бы в кэш
+            # под этой версией.
+            during = get_version(keys)
+        assert get_version(keys) != during, (
+            'Проверьте, что версия таблицы меняется и после фиксации '
+            'транзакции.'
+        )
+
+    def test_05_file_based_cache(self, client, title, settings, tmp_path):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        get(client, TITLES_URL)
+        assert get(client, TITLES_URL)[1] == 0
+        Title.objects.create(name='Второй', year=2001)
+        assert get(client, TITLES_URL)[0]['count'] == 2
@@ -0,0 +1,147 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import versions
+from reviews.models import Category, Comment, Review, Title, User
+
+
+@pytest.fixture
+def reviews():
+    users = [
+        User.objects.create(username=f'reader{index}',
+                            email=f'reader{index}@yamdb.fake')
+        for index in range(2)
+    ]
+    titles = [
+        Title.objects.create(name=f'Книга {index}', year=2000)
+        for index in range(2)
+    ]
+    review = Review.objects.create(
+        title=titles[0], author=users[0], text='text', score=5
+    )
+    return titles, users, review
+
+
+def get(client, url, **headers):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, **headers)
+    return response, len(queries)
+
+
+def revalidate(client, url):
+    response, _ = get(client, url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header('ETag') and response.has_header(
+        'Last-Modified'
+    ), f'Проверьте, что ответ {url} содержит ETag и Last-Modified.'
+    return get(client, url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ConditionalGet:
+
+    def test_01_reviews_not_modified(self, client, reviews):
+        titles, users, _ = reviews
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        response, queries = revalidate(client, url)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert queries == 0, 'Ответ 304 не должен обращаться к базе.'
+        etag = response['ETag']
+
+        # Отзыв к другому произведению не меняет этот список.
+        Review.objects.create(
+            title=titles[1], author=users[1], text='text', score=3
+        )
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        Review.objects.create(
+            title=titles[0], author=users[1], text='text', score=3
+        )
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
+        assert response.json()['count'] == 2
+
+    def test_02_users_only_matter_by_username(self, client, reviews):
+        titles, users, _ = reviews
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        response, _ = revalidate(client, url)
+        etag = response['ETag']
+        User.objects.create(username='newcomer', email='new@yamdb.fake')
+        users[1].bio = 'о себе'
+        users[1].save()
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Регистрация и правка профиля не должны менять ETag отзывов.'
+        )
+        users[0].username = 'renamed'
+        users[0].save()
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_03_title_detail(self, client, reviews):
+        titles, users, _ = reviews
+        url = f'/api/v1/titles/{titles[0].id}/'
+        response, _ = revalidate(client, url)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        Review.objects.create(
+            title=titles[0], author=users[1], text='text', score=9
+        )
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['rating'] == 7
+
+    def test_04_comments_and_if_modified_since(self, client, reviews):
+        titles, users, review = reviews
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/comments/'
+        response, _ = revalidate(client, url)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        response, _ = get(
+            client, url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        Comment.objects.create(review=review, author=users[1], text='text')
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.OK
+
+    def test_05_catalogue_lists(self, client):
+        for url in ('/api/v1/categories/', '/api/v1/genres/'):
+            response, _ = revalidate(client, url)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, url
+        etag = response['ETag']
+        Category.objects.create(name='Кино', slug='movies')
+        response, _ = get(client, '/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_06_versions_expire(self, client, settings, reviews):
+        """Воркер с кэшем в памяти не видит чужую запись, но недолго."""
+        settings.TABLE_VERSION_TIMEOUT = 1
+        titles, users, _ = reviews
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        keys = [versions.KEY_PREFIX + versions.version_key(
+            Review, title=titles[0].id
+        )]
+        response, _ = revalidate(client, url)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        stale = cache.get_many(keys)
+        Review.objects.create(
+            title=titles[0], author=users[1], text='text', score=3
+        )
+        # Запись сделал другой воркер: в этом процессе версия прежняя.
+        cache.set_many(stale, timeout=settings.TABLE_VERSION_TIMEOUT)
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        time.sleep(1.1)
+        response, _ = get(client, url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что версии таблиц в кэше истекают через '
+            '`TABLE_VERSION_TIMEOUT` секунд.'
+        )
+        assert len(response.json()['results']) == 2
@@ -0,0 +1,109 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def review(user):
+    category = Category.objects.create(name='Фильмы', slug='films')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    return Review.objects.create(title=title, author=user, text='text',
+                                 score=5)
+
+
+def review_url(review):
+    return f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23OptimisticLock:
+
+    def test_01_stale_patch_is_rejected(self, moderator_client, review):
+        url = review_url(review)
+        version = moderator_client.get(url).json()['version']
+        assert version == 1
+        first = moderator_client.patch(
+            url, {'text': 'первая правка'}, HTTP_IF_MATCH=f'"{version}"'
+        )
+        assert first.status_code == HTTPStatus.OK
+        assert first.json()['version'] == 2
+        second = moderator_client.patch(
+            url, {'text': 'вторая правка'}, HTTP_IF_MATCH=f'"{version}"'
+        )
+        assert second.status_code == HTTPStatus.PRECONDITION_FAILED, (
+            'Правка по устаревшей версии должна возвращать 412.'
+        )
+        review.refresh_from_db()
+        assert (review.text, review.version) == ('первая правка', 2)
+
+    def test_02_without_if_match(self, moderator_client, review):
+        url = review_url(review)
+        response = moderator_client.patch(url, {'score': 9})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['version'] == 2
+        review.title.refresh_from_db()
+        assert review.title.rating == 9
+
+    def test_03_delete(self, moderator_client, review):
+        url = review_url(review)
+        response = moderator_client.delete(url, HTTP_IF_MATCH='"5"')
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+        assert Review.objects.filter(pk=review.pk).exists()
+        response = moderator_client.delete(url, HTTP_IF_MATCH='"1"')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        review.title.refresh_from_db()
+        assert review.title.rating is None
+
+    def test_04_title_genres_untouched_on_conflict(self, admin_client,
+                                                   review):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        url = f'/api/v1/titles/{review.title_id}/'
+        etag = admin_client.get(url)['ETag']
+        # Рейтинг от отзыва — тоже изменение произведения.
+        assert etag == '"2"'
+        response = admin_client.patch(
+            url, {'genre': [genre.slug]}, HTTP_IF_MATCH='"1"'
+        )
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+        assert not review.title.genre.exists()
+        response = admin_client.patch(
+            url, {'genre': [genre.slug]}, HTTP_IF_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] == f'"{response.json()["version"]}"'
+        assert admin_client.get(url)['ETag'] == response['ETag'], (
+            'ETag ответа на PATCH должен совпадать с ETag следующего GET.'
+        )
+
+    def test_05_comment_and_bad_header(self, user, user_client, review):
+        comment = Comment.objects.create(review=review, author=user,
+                                         text='text')
+        url = f'{review_url(review)}comments/{comment.id}/'
+        response = user_client.patch(url, {'text': 'x'},
+                                     HTTP_IF_MATCH='"не число"')
+        assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+        response = user_client.patch(url, {'text': 'x'}, HTTP_IF_MATCH='*')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['version'] == 2
+
+    def test_06_etag_round_trip(self, moderator_client, review):
+        url = review_url(review)
+        response = moderator_client.get(url)
+        etag = response['ETag']
+        assert etag == f'"{response.json()["version"]}"'
+        assert moderator_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        response = moderator_client.patch(url, {'score': 2},
+                                          HTTP_IF_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        stale = moderator_client.patch(url, {'score': 3}, HTTP_IF_MATCH=etag)
+        assert stale.status_code == HTTPStatus.PRECONDITION_FAILED
+
+    def test_07_author_rename_changes_version(self, user, review):
+        user.username = 'renamed'
+        user.save()
+        review.refresh_from_db()
+        assert review.version == 2
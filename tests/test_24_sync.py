@@ -0,0 +1,161 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+SYNC_URL = '/api/v1/sync/'
+
+
+@pytest.fixture(autouse=True)
+def no_delay(settings):
+    settings.SYNC_DELAY = 0
+
+
+@pytest.fixture
+def catalog(user):
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    title.genre.set([genre])
+    review = Review.objects.create(title=title, author=user, text='text',
+                                   score=5)
+    comment = Comment.objects.create(review=review, author=user, text='text')
+    return {
+        'category': category, 'genre': genre, 'title': title,
+        'review': review, 'comment': comment,
+    }
+
+
+def get_ids(data, resource):
+    return [item['id'] for item in data['changed'][resource]]
+
+
+def sync_all(client, token=None, limit=100):
+    """Проходит все страницы; возвращает их и последний токен."""
+    pages = []
+    while True:
+        params = {'limit': limit}
+        if token:
+            params['since'] = token
+        response = client.get(SYNC_URL, params)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        pages.append(data)
+        token = data['next']
+        if not data['has_more']:
+            return pages, token
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Sync:
+
+    def test_01_full_sync_without_token(self, client, catalog):
+        response = client.get(SYNC_URL)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['next']
+        assert data['has_more'] is False
+        title = data['changed']['titles'][0]
+        assert title['id'] == catalog['title'].id
+        assert title['category'] == catalog['category'].id
+        assert title['genre'] == [catalog['genre'].id]
+        assert title['rating'] == 5
+        assert data['changed']['reviews'][0]['title'] == catalog['title'].id
+        assert data['changed']['comments'][0]['author'] == 'TestUser'
+
+    def test_02_only_changes_since_token(self, client, catalog):
+        token = client.get(SYNC_URL).json()['next']
+        data = client.get(SYNC_URL, {'since': token}).json()
+        for resource in data['changed']:
+            assert get_ids(data, resource) == [], resource
+        comment = catalog['comment']
+        comment.text = 'правка'
+        comment.save()
+        data = client.get(SYNC_URL, {'since': token}).json()
+        assert get_ids(data, 'comments') == [comment.id]
+        for resource in ('categories', 'genres', 'titles', 'reviews'):
+            assert get_ids(data, resource) == [], resource
+
+    def test_03_deleted_objects_are_reported(self, client, catalog):
+        token = client.get(SYNC_URL).json()['next']
+        review_id = catalog['review'].id
+        comment_id = catalog['comment'].id
+        catalog['review'].delete()
+        data = client.get(SYNC_URL, {'since': token}).json()
+        assert data['deleted']['reviews'] == [review_id]
+        assert data['deleted']['comments'] == [comment_id]
+        # Рейтинг пересчитан — произведение тоже изменилось.
+        assert get_ids(data, 'titles') == [catalog['title'].id]
+
+    def test_04_relation_changes_touch_titles(self, client, catalog):
+        title = catalog['title']
+        token = client.get(SYNC_URL).json()['next']
+        title.genre.clear()
+        data = client.get(SYNC_URL, {'since': token}).json()
+        assert get_ids(data, 'titles') == [title.id]
+
+        token = data['next']
+        category_id = catalog['category'].id
+        catalog['category'].delete()
+        data = client.get(SYNC_URL, {'since': token}).json()
+        assert data['deleted']['categories'] == [category_id]
+        assert get_ids(data, 'titles') == [title.id]
+        assert data['changed']['titles'][0]['category'] is None
+
+    def test_05_pages(self, client, catalog):
+        Category.objects.bulk_create(
+            Category(name=f'Категория {index}', slug=f'category-{index}')
+            for index in range(4)
+        )
+        Category.objects.update(updated_at=catalog['category'].updated_at)
+        pages, token = sync_all(client, limit=2)
+        assert len(pages) == 3
+        assert all(len(page['changed']['categories']) <= 2 for page in pages)
+        ids = [
+            category_id for page in pages
+            for category_id in get_ids(page, 'categories')
+        ]
+        assert sorted(ids) == sorted(
+            Category.objects.values_list('id', flat=True)
+        )
+        assert [
+            title_id for page in pages for title_id in get_ids(page, 'titles')
+        ] == [catalog['title'].id]
+
+        deleted = Category.objects.exclude(pk=catalog['category'].pk)
+        deleted_ids = sorted(deleted.values_list('id', flat=True))
+        deleted.delete()
+        pages, _ = sync_all(client, token, limit=2)
+        assert sorted(
+            category_id for page in pages
+            for category_id in page['deleted']['categories']
+        ) == deleted_ids
+
+    def test_06_not_settled_rows_wait(self, client, settings, catalog):
+        settings.SYNC_DELAY = 60
+        data = client.get(SYNC_URL).json()
+        for resource in data['changed']:
+            assert get_ids(data, resource) == [], resource
+
+    @pytest.mark.parametrize('token', (
+        'abc', '1.5', '9' * 30,
+        base64.urlsafe_b64encode(json.dumps([1]).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps({
+            kind: {
+                name: [10 ** 20, 0] for name in (
+                    'categories', 'genres', 'titles', 'reviews', 'comments'
+                )
+            } for kind in ('changed', 'deleted')
+        }).encode()).decode(),
+    ))
+    def test_07_invalid_token(self, client, token):
+        response = client.get(SYNC_URL, {'since': token})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    @pytest.mark.parametrize('limit', (0, 1001, 'x'))
+    def test_08_invalid_limit(self, client, limit):
+        response = client.get(SYNC_URL, {'limit': limit})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+from reviews.changelog import read_changes
+from reviews.models import (Category, ChangeLogEntry, Comment, Genre, Review,
+                            Title)
+
+CHANGES_URL = '/api/v1/changes/'
+
+
+def get_events(after=0):
+    return [
+        (entry.model, entry.object_id, entry.action)
+        for entry in read_changes(after, limit=1000)
+    ]
+
+
+def last_id():
+    return ChangeLogEntry.objects.order_by('id').values_list(
+        'id', flat=True
+    ).last() or 0
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25ChangeLog:
+
+    def test_01_writes_are_logged_in_order(self, user):
+        category = Category.objects.create(name='Фильмы', slug='films')
+        title = Title.objects.create(name='Фильм', year=2000,
+                                     category=category)
+        start = last_id()
+        review = Review.objects.create(title=title, author=user, text='text',
+                                       score=5)
+        comment = Comment.objects.create(review=review, author=user,
+                                         text='text')
+        comment.text = 'правка'
+        comment.save()
+        review_id = review.id
+        review.delete()
+        rating = ('reviews.title', title.id, 'update')
+        assert get_events(start) == [
+            rating,
+            ('reviews.review', review_id, 'create'),
+            ('reviews.comment', comment.id, 'create'),
+            ('reviews.comment', comment.id, 'update'),
+            ('reviews.comment', comment.id, 'delete'),
+            rating,
+            ('reviews.review', review_id, 'delete'),
+        ]
+
+    def test_02_rolled_back_write_is_not_logged(self):
+        start = last_id()
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Genre.objects.create(name='Драма', slug='drama')
+                raise RuntimeError
+        assert get_events(start) == []
+
+    def test_03_genre_relation_logs_title_update(self):
+        title = Title.objects.create(name='Фильм', year=2000)
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        start = last_id()
+        genre_id = genre.id
+        title.genre.add(genre)
+        genre.delete()
+        assert get_events(start) == [
+            ('reviews.title', title.id, 'update'),
+            ('reviews.title', title.id, 'update'),
+            ('reviews.genre', genre_id, 'delete'),
+        ]
+
+    def test_04_entries_are_append_only(self):
+        Genre.objects.create(name='Драма', slug='drama')
+        entry = ChangeLogEntry.objects.last()
+        with pytest.raises(ValueError):
+            entry.save()
+        with pytest.raises(ValueError):
+            entry.delete()
+
+    def test_05_api_tails_by_sequence(self, admin_client, user_client):
+        assert user_client.get(CHANGES_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        start = last_id()
+        genres = [
+            Genre.objects.create(name=f'Жанр {index}', slug=f'genre-{index}')
+            for index in range(3)
+        ]
+        Category.objects.create(name='Фильмы', slug='films')
+        data = admin_client.get(
+            CHANGES_URL, {'after': start, 'limit': 2}
+        ).json()
+        assert [item['object_id'] for item in data['results']] == [
+            genre.id for genre in genres[:2]
+        ]
+        data = admin_client.get(
+            CHANGES_URL, {'after': data['next'], 'model': 'reviews.genre'}
+        ).json()
+        assert [item['object_id'] for item in data['results']] == [
+            genres[2].id
+        ]
+        empty = admin_client.get(CHANGES_URL, {'after': data['next'] + 10})
+        assert empty.json() == {'next': data['next'] + 10, 'results': []}
+        invalid = admin_client.get(CHANGES_URL, {'after': 'abc'})
+        assert invalid.status_code == HTTPStatus.BAD_REQUEST
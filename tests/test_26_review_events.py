@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+
+from api import events
+from api_yamdb.asgi import application
+from reviews.models import Category, Comment, Review, Title
+
+
+def make_scope(title_id, headers=()):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': f'/api/v1/titles/{title_id}/events/',
+        'query_string': b'',
+        'headers': list(headers),
+    }
+
+
+def parse_events(messages):
+    body = b''.join(
+        message.get('body', b'') for message in messages
+        if message['type'] == 'http.response.body'
+    ).decode()
+    parsed = []
+    for block in body.split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in block.splitlines()
+            if line and not line.startswith(':')
+        )
+        if 'id' in fields:
+            parsed.append((
+                int(fields['id']), fields['event'],
+                json.loads(fields['data'])
+            ))
+    return parsed
+
+
+async def open_stream(scope, count):
+    """Запускает поток; он закрывается после count событий."""
+    messages = []
+    closed = asyncio.Event()
+
+    async def receive():
+        await closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if len(parse_events(messages)) >= count:
+            closed.set()
+
+    task = asyncio.ensure_future(application(scope, receive, send))
+    # Ждём, пока поток подпишется.
+    await asyncio.sleep(0.05)
+    return task, messages
+
+
+@pytest.fixture
+def title(user):
+    category = Category.objects.create(name='Фильмы', slug='films')
+    return Title.objects.create(name='Фильм', year=2000, category=category)
+
+
+@pytest.fixture
+def fast_poll(settings):
+    settings.EVENTS_POLL_INTERVAL = 0.01
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ReviewEvents:
+
+    def test_01_new_review_and_comment_are_pushed(
+            self, user, title, fast_poll):
+        other = Title.objects.create(name='Другой', year=2000)
+
+        async def scenario():
+            task, messages = await open_stream(make_scope(title.id), 2)
+            other_task, other_messages = await open_stream(
+                make_scope(other.id), 1
+            )
+            assert len(events.broker.subscribers) == 2
+            review = await sync_to_async(Review.objects.create)(
+                title=title, author=user, text='отзыв', score=7
+            )
+            await sync_to_async(Comment.objects.create)(
+                review=review, author=user, text='комментарий'
+            )
+            await sync_to_async(Review.objects.create)(
+                title=other, author=user, text='другой', score=3
+            )
+            await asyncio.wait_for(
+                asyncio.gather(task, other_task), timeout=5
+            )
+            return messages, other_messages
+
+        messages, other_messages = async_to_sync(scenario)()
+        assert messages[0]['status'] == 200
+        assert (b'content-type', b'text/event-stream') in (
+            messages[0]['headers']
+        )
+        received = parse_events(messages)
+        assert [name for _, name, _ in received] == ['review', 'comment']
+        assert received[0][2]['text'] == 'отзыв'
+        assert received[0][2]['title'] == title.id
+        assert received[1][2]['text'] == 'комментарий'
+        assert [data['text'] for _, _, data in parse_events(
+            other_messages
+        )] == ['другой']
+        assert not events.broker.subscribers
+
+    def test_02_last_event_id_replays_missed_events(self, user, title,
+                                                    fast_poll):
+        first = Review.objects.create(title=title, author=user, text='1',
+                                      score=5)
+        Comment.objects.create(review=first, author=user, text='2')
+        last_seen = events.get_last_id()
+        Comment.objects.create(review=first, author=user, text='3')
+
+        async def scenario():
+            headers = [(b'last-event-id', str(last_seen).encode())]
+            task, messages = await open_stream(
+                make_scope(title.id, headers), 1
+            )
+            await asyncio.wait_for(task, timeout=5)
+            return messages
+
+        received = parse_events(async_to_sync(scenario)())
+        assert [data['text'] for _, _, data in received] == ['3']
+
+    def test_03_long_gap_resets_client(self, user, title, settings,
+                                       fast_poll):
+        settings.EVENTS_REPLAY_LIMIT = 2
+        first = Review.objects.create(title=title, author=user, text='1',
+                                      score=5)
+        last_seen = events.get_last_id()
+        for text in ('2', '3', '4'):
+            Comment.objects.create(review=first, author=user, text=text)
+        assert events.fetch_backlog(last_seen, title.id) is None
+
+        async def scenario():
+            headers = [(b'last-event-id', str(last_seen).encode())]
+            task, messages = await open_stream(
+                make_scope(title.id, headers), 1
+            )
+            await asyncio.wait_for(task, timeout=5)
+            return messages
+
+        received = parse_events(async_to_sync(scenario)())
+        assert received == [(events.get_last_id(), 'reset', {})], (
+            'Проверьте, что после долгого перерыва клиент получает reset '
+            'вместо всего журнала.'
+        )
+
+    def test_04_backlog_is_filtered_by_title(self, user, title, settings):
+        settings.EVENTS_REPLAY_LIMIT = 5
+        other = Title.objects.create(name='Другой', year=2000)
+        last_seen = events.get_last_id()
+        Review.objects.create(title=other, author=user, text='чужой',
+                              score=3)
+        Review.objects.create(title=title, author=user, text='свой',
+                              score=3)
+        assert [event.data['text'] for event in events.fetch_backlog(
+            last_seen, title.id
+        )] == ['свой']
+
+    def test_05_unknown_title(self):
+        async def scenario():
+            task, messages = await open_stream(make_scope(10 ** 6), 1)
+            await asyncio.wait_for(task, timeout=5)
+            assert not events.broker.subscribers
+            return messages
+
+        messages = async_to_sync(scenario)()
+        assert messages[0]['status'] == 404
@@ -1,5 +1,9 @@
 from http import HTTPStatus
 
+from reviews.models import Review, Title, User
+
+TITLES_URL = '/api/v1/titles/'
+
 check_name_and_slug_patterns = (
     (
         {
@@ -280,6 +284,68 @@ def create_comments(admin_client, authors_map):
     return result, reviews, titles
 
 
+def create_users(count, prefix='user'):
+    return [
+        User.objects.create(username=f'{prefix}{index}',
+                            email=f'{prefix}{index}@yamdb.fake')
+        for index in range(count)
+    ]
+
+
+def create_slugged(model, slugs):
+    """Категории или жанры с названием, равным slug."""
+    return [model.objects.create(name=slug, slug=slug) for slug in slugs]
+
+
+def create_title(name, year=2000, category=None, genres=(), scores=(),
+                 authors=()):
+    """Произведение через ORM; оценки ставят authors по порядку."""
+    title = Title.objects.create(name=name, year=year, category=category)
+    if genres:
+        title.genre.set(genres)
+    for author, score in zip(authors, scores):
+        Review.objects.create(
+            title=title, author=author, text='text', score=score
+        )
+    return title
+
+
+def get_titles(client, params=None):
+    response = client.get(TITLES_URL, params or {})
+    assert response.status_code == HTTPStatus.OK
+    return response.json()
+
+
+def get_title_names(client, params=None):
+    return [title['name'] for title in get_titles(client, params)['results']]
+
+
+def get_cursor_pages(client, url, params):
+    """Проходит страницы по ссылкам next, затем обратно по previous.
+
+    Возвращает результаты вперёд и назад, в порядке страниц.
+    """
+    response = client.get(url, {**params, 'cursor': ''})
+    pages = []
+    while True:
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        pages.append(data['results'])
+        if not data['next']:
+            break
+        response = client.get(data['next'])
+    backward = [pages[-1]]
+    while data['previous']:
+        response = client.get(data['previous'])
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        backward.insert(0, data['results'])
+    return (
+        [item for page in pages for item in page],
+        [item for page in backward for item in page],
+    )
+
+
 def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
     obj_types = {
         'comment': 'комментария(ев) к отзыву',